@@ -0,0 +1,5 @@
+import sys
+
+from modbus.cli import main
+
+sys.exit(main())
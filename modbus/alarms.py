@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from modbus.reader import encode_bits
+from modbus.registers import REGISTERS
+
+
+# =========================
+# CONFIG
+# =========================
+
+# WORDs monitorados por padrão (todos lidos pelo perfil "alarms")
+ALARM_KEYS: Tuple[str, ...] = (
+    "alarms_word_1",
+    "alarms_word_2",
+    "alarms_word_3",
+    "digital_inputs",
+    "digital_outputs",
+)
+
+RAISE = "raise"
+CLEAR = "clear"
+
+
+# =========================
+# EVENTOS
+# =========================
+
+@dataclass(frozen=True)
+class BitEvent:
+    """Borda de um bit (raise = 0→1, clear = 1→0)."""
+    key: str
+    bit: int
+    name: str
+    kind: str
+    timestamp: float
+    duration: Optional[float] = None  # só em CLEAR: tempo que o bit ficou ativo
+
+
+# =========================
+# MOTOR DE BORDAS
+# =========================
+
+class EdgeEventEngine:
+    """
+    Compara WORDs sucessivos via XOR e gera eventos só para os bits que mudaram.
+
+    Em regime (nenhum bit mudou) o custo por WORD é um XOR e uma comparação.
+    Aceita o dict retornado por read_profile(..., "alarms") diretamente:
+    valores int (WORD cru) ou dict de bits (decode_bits).
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[str] = ALARM_KEYS,
+        *,
+        registers: Dict[str, Dict[str, Any]] = REGISTERS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.clock = clock
+        self._bit_maps: Dict[str, Dict[int, str]] = {}
+        self._names: Dict[str, List[str]] = {}
+
+        for key in keys:
+            bit_map = registers[key].get("bits", {})
+            self._bit_maps[key] = bit_map
+            self._names[key] = [bit_map.get(b, f"bit_{b:02d}") for b in range(16)]
+
+        self._words: Dict[str, int] = {}
+        self._since: Dict[Tuple[str, int], float] = {}
+
+    def update(self, data: Dict[str, Any], timestamp: float | None = None) -> List[BitEvent]:
+        """
+        Processa uma amostra. Keys ausentes ou None (falha de leitura) são
+        ignoradas e mantêm o último estado conhecido.
+        Na primeira amostra de cada WORD, bits já ativos geram RAISE.
+        """
+        ts = self.clock() if timestamp is None else timestamp
+        events: List[BitEvent] = []
+
+        for key, bit_map in self._bit_maps.items():
+            value = data.get(key)
+            if value is None:
+                continue
+
+            word = encode_bits(value, bit_map) if isinstance(value, dict) else int(value)
+            prev = self._words.get(key, 0)
+            changed = prev ^ word
+            self._words[key] = word
+
+            if not changed:
+                continue
+
+            names = self._names[key]
+            while changed:
+                low = changed & -changed
+                bit = low.bit_length() - 1
+                changed ^= low
+
+                if word & low:
+                    self._since[(key, bit)] = ts
+                    events.append(BitEvent(key, bit, names[bit], RAISE, ts))
+                else:
+                    since = self._since.pop((key, bit), None)
+                    duration = None if since is None else ts - since
+                    events.append(BitEvent(key, bit, names[bit], CLEAR, ts, duration))
+
+        return events
+
+    def active(self) -> List[Tuple[str, str, float]]:
+        """Bits atualmente ativos: (key, nome_do_bit, timestamp_do_raise)."""
+        return [
+            (key, self._names[key][bit], since)
+            for (key, bit), since in sorted(self._since.items())
+        ]
+
+    def word(self, key: str) -> Optional[int]:
+        """Último WORD conhecido de uma key (None se ainda não amostrado)."""
+        return self._words.get(key)
+
+    def reset(self) -> None:
+        self._words.clear()
+        self._since.clear()
@@ -0,0 +1,498 @@
+"""
+Arquivo histórico compacto (colunar, por blocos de tempo).
+
+Layout
+------
+    <raiz>/index_<AAAAMM>.jsonl chunks fechados do mês (UTC do t0), uma linha
+                                por chunk: arquivo, t0, t1, linhas, min/max por key
+    <raiz>/index_open.json      entrada do chunk em aberto
+    <raiz>/chunk_<t0_ms>.mdwc   um chunk = uma janela de tempo (padrão 1 h)
+
+O chunk em aberto é regravado (atomicamente, mesmo nome) a cada
+sync_seconds: uma queda do processo perde no máximo esse intervalo.
+No sync só o index_open.json é reescrito; ao fechar, a entrada vai para o
+fim do índice do mês (append). Anos de histórico não pesam no loop de
+polling nem na abertura do leitor, que só lê os meses da faixa pedida.
+
+Chunk (.mdwc)
+-------------
+    MAGIC (5 bytes) + u32 tamanho do cabeçalho + cabeçalho JSON + colunas
+    • ts        : ms, delta + zigzag varint
+    • u32       : contadores (ex: station_N_dosed_g), delta + zigzag varint
+    • bits      : WORDs de status/alarme, run-length (valor, repetições)
+    • u16       : o menor entre delta e run-length
+    Valores são gravados crus (inteiro antes de decimals); leitura falha = -1.
+
+Consultas usam só os índices para escolher chunks e decodificam apenas as
+colunas pedidas.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from modbus.reader import apply_decimals, decode_bits, encode_bits
+from modbus.registers import REGISTERS
+
+
+# =========================
+# CONFIG
+# =========================
+
+MAGIC = b"MDWA\x01"
+HEADER_LEN = struct.Struct("<I")
+INDEX_OPEN = "index_open.json"
+INDEX_MONTH = "index_{}.jsonl"
+INDEX_LEGACY = "index.json"  # índice único de versões anteriores
+CHUNK_EXT = ".mdwc"
+
+MISSING = -1
+
+ENC_DELTA = "delta"
+ENC_RLE = "rle"
+
+
+# =========================
+# VARINT / ZIGZAG
+# =========================
+
+def _zigzag(n: int) -> int:
+    return (n << 1) if n >= 0 else ((-n << 1) - 1)
+
+
+def _unzigzag(n: int) -> int:
+    return (n >> 1) if not n & 1 else -((n + 1) >> 1)
+
+
+def _put_varint(out: bytearray, n: int) -> None:
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _varints(data: bytes) -> Iterator[int]:
+    n = shift = 0
+    for byte in data:
+        n |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            yield n
+            n = shift = 0
+
+
+# =========================
+# CODIFICAÇÃO DE COLUNAS
+# =========================
+
+def encode_delta(values: Sequence[int]) -> bytes:
+    out = bytearray()
+    prev = 0
+    for v in values:
+        _put_varint(out, _zigzag(v - prev))
+        prev = v
+    return bytes(out)
+
+
+def decode_delta(data: bytes) -> List[int]:
+    out: List[int] = []
+    prev = 0
+    for d in _varints(data):
+        prev += _unzigzag(d)
+        out.append(prev)
+    return out
+
+
+def encode_rle(values: Sequence[int]) -> bytes:
+    out = bytearray()
+    i = 0
+    while i < len(values):
+        j = i
+        while j + 1 < len(values) and values[j + 1] == values[i]:
+            j += 1
+        _put_varint(out, _zigzag(values[i]))
+        _put_varint(out, j - i + 1)
+        i = j + 1
+    return bytes(out)
+
+
+def decode_rle(data: bytes) -> List[int]:
+    out: List[int] = []
+    it = _varints(data)
+    for value in it:
+        out.extend([_unzigzag(value)] * next(it))
+    return out
+
+
+DECODERS = {ENC_DELTA: decode_delta, ENC_RLE: decode_rle}
+
+
+# =========================
+# CONVERSÃO VALOR <-> CRU
+# =========================
+
+def to_raw(spec: Dict[str, Any], value: Any) -> int:
+    if value is None:
+        return MISSING
+    if isinstance(value, dict):
+        return encode_bits(value, spec.get("bits", {}))
+    return int(round(float(value) * (10 ** int(spec.get("decimals", 0)))))
+
+
+def from_raw(spec: Dict[str, Any], raw: int) -> Any:
+    if raw == MISSING:
+        return None
+    if "bits" in spec:
+        return decode_bits(raw, spec["bits"])
+    return apply_decimals(raw, int(spec.get("decimals", 0)))
+
+
+def _encode_column(spec: Dict[str, Any], raw: List[int]) -> Tuple[str, bytes]:
+    if "bits" in spec:
+        return ENC_RLE, encode_rle(raw)
+    if spec.get("type") == "u32":
+        return ENC_DELTA, encode_delta(raw)
+
+    delta, rle = encode_delta(raw), encode_rle(raw)
+    return (ENC_RLE, rle) if len(rle) < len(delta) else (ENC_DELTA, delta)
+
+
+# =========================
+# ESCRITA
+# =========================
+
+class ArchiveWriter:
+    """
+    Acumula amostras (dicts do read_profile) e grava um chunk por janela
+    de tempo. O chunk em aberto vai para o disco a cada sync_seconds;
+    chame close() no fim para gravar as últimas linhas.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        *,
+        chunk_seconds: int = 3600,
+        max_rows: int = 65536,
+        sync_seconds: float = 60.0,
+        registers: Dict[str, Dict[str, Any]] = REGISTERS,
+    ):
+        self.root = root
+        self.chunk_seconds = chunk_seconds
+        self.max_rows = max_rows
+        self.sync_seconds = sync_seconds
+        self.registers = registers
+
+        os.makedirs(root, exist_ok=True)
+        _recover_index(root)
+
+        self._window: Optional[int] = None
+        self._ts: List[int] = []
+        self._columns: Dict[str, List[int]] = {}
+        self._synced_rows = 0
+        self._synced_at = time.monotonic()
+        self._entry: Optional[Dict[str, Any]] = None
+
+    def append(self, data: Dict[str, Any], timestamp: float | None = None) -> None:
+        ts = time.time() if timestamp is None else timestamp
+        window = int(ts // self.chunk_seconds)
+
+        if self._window is not None and (window != self._window or len(self._ts) >= self.max_rows):
+            self.flush()
+        self._window = window
+
+        row = len(self._ts)
+        self._ts.append(int(round(ts * 1000)))
+
+        for key, value in data.items():
+            column = self._columns.get(key)
+            if column is None:
+                # key nova no meio do chunk: linhas anteriores ficam como falha
+                column = self._columns[key] = [MISSING] * row
+            column.append(to_raw(self.registers[key], value))
+
+        for key, column in self._columns.items():
+            if len(column) <= row:
+                column.append(MISSING)
+
+        if time.monotonic() - self._synced_at >= self.sync_seconds:
+            self.sync()
+
+    def sync(self) -> None:
+        """Grava o chunk em aberto sem fechá-lo (substitui a versão anterior)."""
+        if len(self._ts) > self._synced_rows:
+            self._write_chunk()
+        self._synced_at = time.monotonic()
+
+    def flush(self) -> None:
+        """Grava e fecha o chunk em aberto; a próxima amostra abre outro."""
+        self.sync()
+        if self._entry is not None:
+            _close_entry(self.root, self._entry)
+            self._entry = None
+        self._ts = []
+        self._columns = {}
+        self._synced_rows = 0
+
+    def _write_chunk(self) -> None:
+
+        t0, t1 = self._ts[0], self._ts[-1]
+        header: Dict[str, Any] = {"t0": t0, "t1": t1, "rows": len(self._ts), "columns": {}}
+        blobs: List[bytes] = []
+        offset = 0
+
+        ts_blob = encode_delta(self._ts)
+        header["ts"] = {"enc": ENC_DELTA, "offset": 0, "length": len(ts_blob)}
+        blobs.append(ts_blob)
+        offset += len(ts_blob)
+
+        stats: Dict[str, Tuple[Optional[int], Optional[int]]] = {}
+        for key, raw in self._columns.items():
+            enc, blob = _encode_column(self.registers[key], raw)
+            present = [v for v in raw if v != MISSING]
+            lo, hi = (min(present), max(present)) if present else (None, None)
+            stats[key] = (lo, hi)
+            header["columns"][key] = {"enc": enc, "offset": offset, "length": len(blob), "min": lo, "max": hi}
+            blobs.append(blob)
+            offset += len(blob)
+
+        name = f"chunk_{t0}{CHUNK_EXT}"
+        head = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        tmp = os.path.join(self.root, name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + HEADER_LEN.pack(len(head)) + head)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp, os.path.join(self.root, name))
+
+        self._entry = {"file": name, "t0": t0, "t1": t1, "rows": len(self._ts), "stats": stats}
+        _write_json(os.path.join(self.root, INDEX_OPEN), self._entry)
+        self._synced_rows = len(self._ts)
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# =========================
+# ÍNDICE
+# =========================
+
+def _month(t_ms: int) -> str:
+    return time.strftime("%Y%m", time.gmtime(t_ms / 1000.0))
+
+
+def _prev_month(month: str) -> str:
+    year, mon = int(month[:4]), int(month[4:])
+    return f"{year - 1}12" if mon == 1 else f"{year}{mon - 1:02d}"
+
+
+def _write_json(path: str, obj: Any) -> None:
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(obj, f, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+
+
+def _read_json(path: str) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _read_month(root: str, month: str) -> List[Dict[str, Any]]:
+    path = os.path.join(root, INDEX_MONTH.format(month))
+    if not os.path.exists(path):
+        return []
+    out = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                out.append(json.loads(line))
+            except ValueError:
+                continue  # linha final cortada por queda no meio do append
+    return out
+
+
+def _append_entry(root: str, entry: Dict[str, Any]) -> None:
+    path = os.path.join(root, INDEX_MONTH.format(_month(entry["t0"])))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("\n" + json.dumps(entry, separators=(",", ":")) + "\n")
+
+
+def _close_entry(root: str, entry: Dict[str, Any]) -> None:
+    """Chunk fechado: entrada vai para o índice do mês; some o índice do aberto."""
+    _append_entry(root, entry)
+    try:
+        os.remove(os.path.join(root, INDEX_OPEN))
+    except FileNotFoundError:
+        pass
+
+
+def _recover_index(root: str) -> None:
+    """
+    Na abertura do writer: fecha o chunk que ficou aberto (queda do processo)
+    e converte o index.json único de versões anteriores para os índices mensais.
+    """
+    legacy = os.path.join(root, INDEX_LEGACY)
+    if os.path.exists(legacy):
+        for entry in _read_json(legacy):
+            _append_entry(root, entry)
+        os.remove(legacy)
+
+    path = os.path.join(root, INDEX_OPEN)
+    if os.path.exists(path):
+        try:
+            entry = _read_json(path)
+        except ValueError:
+            entry = None
+        if entry is not None and all(c["file"] != entry["file"] for c in _read_month(root, _month(entry["t0"]))):
+            _append_entry(root, entry)
+        os.remove(path)
+
+
+# =========================
+# LEITURA
+# =========================
+
+class ArchiveReader:
+    """Consulta por faixa de tempo; só abre os chunks que a faixa toca."""
+
+    def __init__(self, root: str, *, registers: Dict[str, Dict[str, Any]] = REGISTERS):
+        self.root = root
+        self.registers = registers
+
+    def _entries(self, lo_ms: Optional[int], hi_ms: Optional[int]) -> List[Dict[str, Any]]:
+        """Entradas dos índices mensais da faixa (+ chunk aberto), ordenadas por t0."""
+        months = sorted(
+            name[len("index_"):-len(".jsonl")]
+            for name in os.listdir(self.root)
+            if name.startswith("index_") and name.endswith(".jsonl")
+        )
+        # o mês anterior entra porque um chunk pode atravessar a virada do mês
+        first = None if lo_ms is None else _prev_month(_month(lo_ms))
+        last = None if hi_ms is None else _month(hi_ms)
+
+        entries: Dict[str, Dict[str, Any]] = {}
+        for month in months:
+            if (first is None or month >= first) and (last is None or month <= last):
+                for entry in _read_month(self.root, month):
+                    entries[entry["file"]] = entry
+
+        for name in (INDEX_OPEN, INDEX_LEGACY):
+            path = os.path.join(self.root, name)
+            try:
+                loaded = _read_json(path)
+            except (OSError, ValueError):
+                continue  # ausente ou sendo substituído pelo writer
+            for entry in loaded if isinstance(loaded, list) else [loaded]:
+                entries.setdefault(entry["file"], entry)
+
+        return sorted(entries.values(), key=lambda c: c["t0"])
+
+    def chunks(
+        self,
+        t_start: float | None = None,
+        t_end: float | None = None,
+        where: Optional[Dict[str, Tuple[float, float]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Chunks que tocam [t_start, t_end] (segundos). where={key: (lo, hi)}
+        descarta pelo min/max do índice os chunks sem nenhum valor na faixa
+        (só keys numéricas; keys de bits levantam ValueError).
+        """
+        for key in where or {}:
+            if "bits" in self.registers[key]:
+                # min/max de uma WORD de bits não diz nada sobre os bits
+                raise ValueError(f"where não suporta key de bits: {key!r}")
+
+        lo_ms = None if t_start is None else int(t_start * 1000)
+        hi_ms = None if t_end is None else int(t_end * 1000)
+        out = []
+
+        for chunk in self._entries(lo_ms, hi_ms):
+            if lo_ms is not None and chunk["t1"] < lo_ms:
+                continue
+            if hi_ms is not None and chunk["t0"] > hi_ms:
+                continue
+            if where and not self._may_match(chunk, where):
+                continue
+            out.append(chunk)
+        return out
+
+    def _may_match(self, chunk: Dict[str, Any], where: Dict[str, Tuple[float, float]]) -> bool:
+        for key, (lo, hi) in where.items():
+            cmin, cmax = chunk["stats"].get(key, (None, None))
+            if cmin is None:
+                return False
+            scale = 10 ** int(self.registers[key].get("decimals", 0))
+            if cmax < lo * scale or cmin > hi * scale:
+                return False
+        return True
+
+    def query(
+        self,
+        keys: Sequence[str],
+        t_start: float | None = None,
+        t_end: float | None = None,
+        where: Optional[Dict[str, Tuple[float, float]]] = None,
+    ) -> Dict[str, List[Any]]:
+        """
+        Retorna colunas {"ts": [...segundos], key: [...valores]} das linhas em
+        [t_start, t_end]. Com where, só linhas com todos os valores na faixa.
+        """
+        out: Dict[str, List[Any]] = {"ts": []}
+        for key in keys:
+            out[key] = []
+
+        lo_ms = None if t_start is None else int(t_start * 1000)
+        hi_ms = None if t_end is None else int(t_end * 1000)
+        wanted = list(dict.fromkeys(list(keys) + list(where or {})))
+
+        for chunk in self.chunks(t_start, t_end, where):
+            ts, columns = self._read_chunk(chunk["file"], wanted)
+            for i, t in enumerate(ts):
+                if (lo_ms is not None and t < lo_ms) or (hi_ms is not None and t > hi_ms):
+                    continue
+                row = {k: columns[k][i] for k in wanted}
+                if where and not all(
+                    row[k] is not None and lo <= row[k] <= hi for k, (lo, hi) in where.items()
+                ):
+                    continue
+                out["ts"].append(t / 1000.0)
+                for key in keys:
+                    out[key].append(row[key])
+
+        return out
+
+    def _read_chunk(self, name: str, keys: Sequence[str]) -> Tuple[List[int], Dict[str, List[Any]]]:
+        with open(os.path.join(self.root, name), "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Chunk inválido: {name}")
+            (head_len,) = HEADER_LEN.unpack(f.read(HEADER_LEN.size))
+            header = json.loads(f.read(head_len))
+            base = len(MAGIC) + HEADER_LEN.size + head_len
+
+            def column(meta: Dict[str, Any]) -> List[int]:
+                f.seek(base + meta["offset"])
+                return DECODERS[meta["enc"]](f.read(meta["length"]))
+
+            ts = column(header["ts"])
+            columns: Dict[str, List[Any]] = {}
+            for key in keys:
+                meta = header["columns"].get(key)
+                if meta is None:
+                    columns[key] = [None] * header["rows"]
+                    continue
+                spec = self.registers[key]
+                columns[key] = [from_raw(spec, raw) for raw in column(meta)]
+
+        return ts, columns
@@ -0,0 +1,311 @@
+"""
+Captura binária do barramento e replay determinístico.
+
+Formato (little-endian, append-only, amigável a mmap)
+-----------------------------------------------------
+• arquivo .mbcap:
+      cabeçalho: MAGIC (8 bytes)
+      registros: <d B B H H H> + payload
+                 t_monotonic, slave, function, address, count, n_bytes
+                 payload = WORDs em big-endian (ordem do fio Modbus)
+• arquivo .mbcap.idx:
+      u64 por registro = offset do registro no .mbcap
+
+function com bit 0x80 = falha (exceção Modbus, timeout, CRC); payload vazio
+em leituras e, em escritas, os WORDs que o cliente tentou escrever.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterator, List, Sequence, Tuple
+
+from modbus.link import ModbusProtocolError
+from modbus.rtu import FC_ERROR_FLAG, FC_READ_HOLDING, FC_WRITE_MULTIPLE, FC_WRITE_SINGLE
+
+
+# =========================
+# FORMATO
+# =========================
+
+MAGIC = b"MBCAP\x01\x00\x00"
+RECORD = struct.Struct("<dBBHHH")
+INDEX = struct.Struct("<Q")
+
+
+@dataclass(frozen=True)
+class Frame:
+    timestamp: float
+    slave: int
+    function: int
+    address: int
+    count: int
+    payload: Tuple[int, ...]
+
+    @property
+    def ok(self) -> bool:
+        return not self.function & FC_ERROR_FLAG
+
+    @property
+    def base_function(self) -> int:
+        return self.function & ~FC_ERROR_FLAG
+
+
+def index_path(path: str) -> str:
+    return path + ".idx"
+
+
+# =========================
+# ESCRITA
+# =========================
+
+class CaptureWriter:
+    """
+    Anexa frames ao log binário (e ao índice) sem reescrever nada.
+
+    Ao reabrir um log existente o índice é reconstruído a partir dos dados
+    e um registro final incompleto (queda no meio da escrita) é cortado,
+    para que os novos frames não fiquem atrás de lixo.
+    """
+
+    def __init__(self, path: str, *, flush_every: int = 64):
+        self.path = path
+        self.flush_every = flush_every
+
+        new = not os.path.exists(path) or os.path.getsize(path) < len(MAGIC)
+        offsets, end = ([], len(MAGIC)) if new else _scan(path)
+
+        self._data = open(path, "ab")
+        if new:
+            self._data.truncate(0)
+            self._data.write(MAGIC)
+        else:
+            self._data.truncate(end)
+        self._data.flush()
+        self._offset = end
+
+        self._index = open(index_path(path), "wb")
+        for offset in offsets:
+            self._index.write(INDEX.pack(offset))
+        self._index.flush()
+        self._pending = 0
+
+    def record(
+        self,
+        slave: int,
+        function: int,
+        address: int,
+        count: int,
+        payload: Sequence[int] = (),
+        *,
+        timestamp: float | None = None,
+    ) -> None:
+        ts = time.monotonic() if timestamp is None else timestamp
+        body = struct.pack(f">{len(payload)}H", *payload)
+
+        self._index.write(INDEX.pack(self._offset))
+        self._data.write(RECORD.pack(ts, slave, function, address, count, len(body)))
+        self._data.write(body)
+        self._offset += RECORD.size + len(body)
+
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        self._data.flush()
+        self._index.flush()
+        self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self) -> "CaptureWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# =========================
+# LEITURA
+# =========================
+
+def _scan(path: str) -> Tuple[List[int], int]:
+    """Varre o .mbcap: (offsets dos registros completos, fim do último)."""
+    offsets: List[int] = []
+    size = os.path.getsize(path)
+
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Arquivo de captura inválido: {path}")
+        offset = len(MAGIC)
+        while offset + RECORD.size <= size:
+            f.seek(offset)
+            n_bytes = RECORD.unpack(f.read(RECORD.size))[5]
+            if offset + RECORD.size + n_bytes > size:
+                break  # registro final incompleto
+            offsets.append(offset)
+            offset += RECORD.size + n_bytes
+
+    return offsets, offset
+
+
+def _scan_offsets(path: str) -> List[int]:
+    """Reconstrói o índice varrendo o .mbcap (ex: índice perdido/truncado)."""
+    return _scan(path)[0]
+
+
+class CaptureReader:
+    """Acesso aleatório aos frames via mmap + índice."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Arquivo de captura inválido: {path}")
+
+        self._offsets = self._load_index()
+
+    def _load_index(self) -> List[int]:
+        ipath = index_path(self.path)
+        if os.path.exists(ipath):
+            with open(ipath, "rb") as f:
+                raw = f.read()
+            n = len(raw) // INDEX.size
+            offsets = [o for (o,) in INDEX.iter_unpack(raw[:n * INDEX.size])]
+            # índice e dados são gravados/flushados separadamente: descarta
+            # entradas cujo registro (cabeçalho + payload) ainda não está todo no disco
+            while offsets and not self._complete(offsets[-1]):
+                offsets.pop()
+            return offsets
+        return _scan_offsets(self.path)
+
+    def _complete(self, offset: int) -> bool:
+        size = len(self._mm)
+        if offset + RECORD.size > size:
+            return False
+        n_bytes = RECORD.unpack_from(self._mm, offset)[5]
+        return offset + RECORD.size + n_bytes <= size
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, i: int) -> Frame:
+        offset = self._offsets[i]
+        ts, slave, function, address, count, n_bytes = RECORD.unpack_from(self._mm, offset)
+        payload = struct.unpack_from(f">{n_bytes // 2}H", self._mm, offset + RECORD.size)
+        return Frame(ts, slave, function, address, count, payload)
+
+    def __iter__(self) -> Iterator[Frame]:
+        for i in range(len(self._offsets)):
+            yield self[i]
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "CaptureReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# =========================
+# TRANSPORTE DE REPLAY
+# =========================
+
+class ReplayClient:
+    """
+    Substituto do ModbusClientRS485 que responde com os frames gravados.
+
+    Cada read_holding consome a próxima resposta gravada para o mesmo
+    (slave, address, count). realtime=True respeita os intervalos
+    originais; realtime=False responde o mais rápido possível (benchmark,
+    reprocessamento de um dia de tráfego).
+    """
+
+    def __init__(self, path: str, *, slave_id: int = 1, realtime: bool = False, retries: int = 3):
+        self.port = path
+        self.slave_id = slave_id
+        self.realtime = realtime
+        self.retries = retries
+
+        self._reader = CaptureReader(path)
+        self._pending: Dict[Tuple[int, int, int, int], Deque[int]] = defaultdict(deque)
+        for i, frame in enumerate(self._reader):
+            key = (frame.slave, frame.base_function, frame.address, frame.count)
+            self._pending[key].append(i)
+
+        self._t0_capture: float | None = None
+        self._t0_replay: float | None = None
+
+    # =========================
+    # CONEXÃO
+    # =========================
+
+    def connect(self) -> None:
+        self._t0_capture = None
+        self._t0_replay = None
+
+    def close(self) -> None:
+        self._reader.close()
+
+    @property
+    def remaining(self) -> int:
+        """Leituras (FC03) gravadas ainda não consumidas; escritas não contam."""
+        return sum(len(q) for key, q in self._pending.items() if key[1] == FC_READ_HOLDING)
+
+    # =========================
+    # REPLAY
+    # =========================
+
+    def _take(self, function: int, address: int, count: int) -> Frame | None:
+        queue = self._pending.get((self.slave_id, function, address, count))
+        if not queue:
+            return None
+        frame = self._reader[queue.popleft()]
+
+        if self.realtime:
+            now = time.monotonic()
+            if self._t0_capture is None:
+                self._t0_capture, self._t0_replay = frame.timestamp, now
+            delay = (frame.timestamp - self._t0_capture) - (now - self._t0_replay)
+            if delay > 0:
+                time.sleep(delay)
+
+        return frame
+
+    def read_holding(self, address: int, count: int) -> List[int]:
+        # Reproduz as tentativas do cliente real: falha gravada + retry com sucesso
+        for _ in range(self.retries):
+            frame = self._take(FC_READ_HOLDING, address, count)
+            if frame is None:
+                raise ModbusProtocolError(
+                    f"Sem resposta gravada para addr={address} count={count} slave={self.slave_id}"
+                )
+            if frame.ok:
+                return list(frame.payload)
+
+        raise ModbusProtocolError(f"Falha lendo holding registers addr={address} count={count} (gravado)")
+
+    def write_single(self, address: int, value: int) -> None:
+        frame = self._take(FC_WRITE_SINGLE, address, 1)
+        if frame is not None and not frame.ok:
+            raise ModbusProtocolError(f"Erro escrevendo register addr={address} (gravado)")
+
+    def write_multiple(self, address: int, values: List[int]) -> None:
+        frame = self._take(FC_WRITE_MULTIPLE, address, len(values))
+        if frame is not None and not frame.ok:
+            raise ModbusProtocolError(f"Erro escrevendo registers addr={address} (gravado)")
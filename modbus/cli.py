@@ -0,0 +1,231 @@
+"""
+CLI de execução única: python -m modbus {read,write,dump} ...
+
+Exemplos
+--------
+    python -m modbus --port COM3 read actual_throughput_kgh
+    python -m modbus --port /dev/ttyUSB0 read basic alarms
+    python -m modbus --port COM3 write station_1_setpoint=25.0 batch_value_g=2000
+    python -m modbus --port COM3 write mdw_command.run=1
+    python -m modbus --port COM3 dump 50-55
+
+Saída: um objeto JSON por linha no stdout (erros: {"error": ...}, exit 1).
+Imports são tardios para que a partida até o primeiro byte no fio seja curta:
+o caminho padrão (--driver rtu) usa só pyserial, sem pymodbus.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# =========================
+# ARGUMENTOS
+# =========================
+
+def build_parser() -> argparse.ArgumentParser:
+    env = os.environ.get
+    parser = argparse.ArgumentParser(prog="python -m modbus", description="Modbus client - leitura/escrita pontual")
+    parser.add_argument("--port", default=env("MODBUS_PORT"), help="Porta serial (padrão: env MODBUS_PORT)")
+    parser.add_argument("--baudrate", type=int, default=int(env("MODBUS_BAUDRATE", 9600)))
+    parser.add_argument("--parity", default=env("MODBUS_PARITY", "N"), choices=["N", "E", "O"])
+    parser.add_argument("--stopbits", type=int, default=1)
+    parser.add_argument("--bytesize", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=1.0)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--slave", type=int, default=int(env("MODBUS_SLAVE", 1)))
+    parser.add_argument("--base", type=int, default=int(env("MODBUS_BASE", 0)), help="base_address")
+    parser.add_argument("--map", default=env("MODBUS_MAP"), help="Mapa externo JSON/YAML/CSV")
+    parser.add_argument("--driver", choices=["rtu", "pymodbus"], default="rtu")
+
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_read = sub.add_parser("read", help="Lê keys e/ou perfis")
+    p_read.add_argument("names", nargs="+", metavar="key|profile")
+
+    p_write = sub.add_parser("write", help="Escreve key=valor (bits: key.bit=0/1)")
+    p_write.add_argument("assignments", nargs="+", metavar="key=value")
+    p_write.add_argument("--verify", action="store_true", help="Relê e confere após escrever")
+
+    p_dump = sub.add_parser("dump", help="Dump cru de holding registers")
+    p_dump.add_argument("range", help="'inicio-fim' (inclusivo), 'inicio:quantidade' ou 'endereco'")
+    p_dump.add_argument("--absolute", action="store_true", help="Endereços absolutos (ignora --base)")
+
+    return parser
+
+
+def parse_range(text: str) -> Tuple[int, int]:
+    """Retorna (inicio, quantidade)."""
+    if ":" in text:
+        start, count = text.split(":", 1)
+        return int(start), int(count)
+    if "-" in text:
+        start, end = text.split("-", 1)
+        if int(end) < int(start):
+            raise ValueError(f"Faixa inválida: {text}")
+        return int(start), int(end) - int(start) + 1
+    return int(text), 1
+
+
+def _parse_value(text: str) -> Any:
+    lowered = text.strip().lower()
+    if lowered in ("true", "on"):
+        return True
+    if lowered in ("false", "off"):
+        return False
+    return float(text)
+
+
+def parse_assignments(items: List[str]) -> Dict[str, Any]:
+    """'key=valor' e 'key.bit=0/1' -> dict para RegisterWriter.write."""
+    values: Dict[str, Any] = {}
+    for item in items:
+        if "=" not in item:
+            raise ValueError(f"Atribuição inválida: {item!r} (use key=valor)")
+        target, raw = item.split("=", 1)
+        value = _parse_value(raw)
+
+        if "." in target:
+            key, bit = target.split(".", 1)
+            values.setdefault(key, {})[bit] = bool(value)
+        else:
+            values[target] = value
+    return values
+
+
+# =========================
+# CONEXÃO / MAPA
+# =========================
+
+def _open_client(args):
+    if not args.port:
+        raise ValueError("Porta não informada (--port ou env MODBUS_PORT)")
+
+    params = dict(
+        port=args.port,
+        baudrate=args.baudrate,
+        parity=args.parity,
+        stopbits=args.stopbits,
+        bytesize=args.bytesize,
+        timeout=args.timeout,
+        retries=args.retries,
+        slave_id=args.slave,
+    )
+
+    if args.driver == "pymodbus":
+        from modbus.client import ModbusClientRS485
+
+        client = ModbusClientRS485(**params)
+    else:
+        from modbus.rtu import RtuClient
+
+        # execução única não reconecta: dispensa a varredura de portas
+        client = RtuClient(**params, follow_port=False)
+    client.connect()
+    return client
+
+
+def _load_map(args) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, List[str]]]:
+    if args.map:
+        from modbus.regmap import load_register_map
+
+        regmap = load_register_map(args.map)
+        return regmap.registers, regmap.profiles
+
+    from modbus.reader import PROFILES
+    from modbus.registers import REGISTERS
+
+    return REGISTERS, PROFILES
+
+
+# =========================
+# COMANDOS
+# =========================
+
+def cmd_read(args, client, registers, profiles) -> Tuple[Dict[str, Any], bool]:
+    from modbus.reader import read_many_block
+
+    keys: List[str] = []
+    for name in args.names:
+        if name in profiles:
+            keys.extend(k for k in profiles[name] if k not in keys)
+        elif name in registers:
+            if name not in keys:
+                keys.append(name)
+        else:
+            raise ValueError(f"Key/perfil desconhecido: {name}")
+
+    data = read_many_block(client, keys, base_address=args.base, slave_id=args.slave, registers=registers)
+    return data, all(v is not None for v in data.values())
+
+
+def cmd_write(args, client, registers, profiles) -> Tuple[Dict[str, Any], bool]:
+    from modbus.writer import RegisterWriter
+
+    values = parse_assignments(args.assignments)
+    writer = RegisterWriter(
+        client, base_address=args.base, slave_id=args.slave, verify=args.verify, registers=registers
+    )
+    transactions = writer.write(values)
+    return {"written": sorted(values), "transactions": transactions}, True
+
+
+def cmd_dump(args, client, registers, profiles) -> Tuple[Dict[str, Any], bool]:
+    from modbus.rtu import MAX_READ_WORDS
+
+    start, count = parse_range(args.range)
+    address = start if args.absolute else start + args.base
+
+    words: List[int] = []
+    while len(words) < count:
+        n = min(MAX_READ_WORDS, count - len(words))
+        words.extend(client.read_holding(address=address + len(words), count=n))
+
+    return {"start": start, "address": address, "words": words}, True
+
+
+COMMANDS = {
+    "read": cmd_read,
+    "write": cmd_write,
+    "dump": cmd_dump,
+}
+
+
+# =========================
+# MAIN
+# =========================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if os.environ.get("MODBUS_LOG"):
+        import logging
+
+        logging.basicConfig(
+            level=getattr(logging, os.environ["MODBUS_LOG"].upper(), logging.INFO),
+            format="%(asctime)s | %(levelname)s | %(message)s",
+            stream=sys.stderr,
+        )
+
+    client = None
+    try:
+        registers, profiles = _load_map(args)
+        client = _open_client(args)
+        out, ok = COMMANDS[args.command](args, client, registers, profiles)
+        out = {"ts": time.time(), **out}
+    except Exception as e:
+        out, ok = {"error": str(e)}, False
+    finally:
+        if client is not None:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    sys.stdout.write(json.dumps(out, ensure_ascii=False, separators=(",", ":")) + "\n")
+    return 0 if ok else 1
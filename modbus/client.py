@@ -5,6 +5,22 @@ import logging
 from typing import List
 
 from pymodbus.client import ModbusSerialClient
+from pymodbus.exceptions import ConnectionException
+
+from modbus.capture import CaptureWriter
+from modbus.link import (
+    ModbusProtocolError,
+    ModbusTransportError,
+    port_identity,
+    reconnect_port,
+)
+from modbus.rtu import (
+    FC_ERROR_FLAG,
+    FC_READ_HOLDING,
+    FC_WRITE_MULTIPLE,
+    FC_WRITE_SINGLE,
+    frame_silence,
+)
 
 
 # =========================
@@ -36,22 +52,30 @@ class ModbusClientRS485:
         slave_id: int = 0,
         retries: int = DEFAULT_RETRIES,
         logger: logging.Logger | None = None,
+        capture: CaptureWriter | None = None,
     ):
         self.port = port
         self.slave_id = slave_id
         self.retries = retries
+        self.silence = frame_silence(baudrate)
+
+        # Se definido, todo request/response é anexado ao log binário
+        self.capture = capture
 
         self.logger = logger or logging.getLogger("modbus-client")
 
-        self.client = ModbusSerialClient(
-            method="rtu",
-            port=port,
+        self._serial_params = dict(
             baudrate=baudrate,
             parity=parity,
             stopbits=stopbits,
             bytesize=bytesize,
             timeout=timeout,
         )
+        self._identity = None
+        self.client = self._build_client()
+
+    def _build_client(self) -> ModbusSerialClient:
+        return ModbusSerialClient(method="rtu", port=self.port, **self._serial_params)
 
     # =========================
     # CONEXÃO
@@ -59,13 +83,61 @@ class ModbusClientRS485:
 
     def connect(self) -> None:
         if not self.client.connect():
-            raise ConnectionError(f"Falha ao conectar na porta {self.port}")
+            raise ModbusTransportError(f"Falha ao conectar na porta {self.port}")
+        # guarda a identidade do adaptador para achá-lo se for re-enumerado
+        self._identity = port_identity(self.port) or self._identity
         self.logger.info("Conectado ao Modbus RTU (%s)", self.port)
 
     def close(self) -> None:
         self.client.close()
+        if self.capture is not None:
+            self.capture.flush()
         self.logger.info("Conexão Modbus encerrada")
 
+    def _capture(self, function: int, address: int, count: int, payload: List[int]) -> None:
+        if self.capture is not None:
+            self.capture.record(self.slave_id, function, address, count, payload)
+
+    # =========================
+    # RECUPERAÇÃO DO LINK
+    # =========================
+
+    def resync(self) -> None:
+        """
+        Descarta bytes pendentes e espera o silêncio entre frames.
+
+        ATENÇÃO: o pymodbus 3.6 já fecha a porta sozinho a cada resposta
+        ausente/inválida, então aqui a ressincronização não evita a reabertura
+        do adaptador. Para polling contínuo em linha ruidosa use RtuClient
+        (modbus.rtu), que ressincroniza com a porta aberta.
+        """
+        serial_port = getattr(self.client, "socket", None)
+        if serial_port is not None:
+            try:
+                serial_port.reset_input_buffer()
+            except OSError as e:
+                raise ModbusTransportError(f"Porta {self.port} perdida: {e}") from e
+        time.sleep(self.silence)
+
+    def reconnect(self, *, attempts: int = 0, base_delay: float = 0.5, max_delay: float = 10.0) -> None:
+        """Reabre a porta após perda real (ver link.reconnect_port)."""
+        reconnect_port(
+            self,
+            self._identity,
+            self._set_port,
+            attempts=attempts,
+            base_delay=base_delay,
+            max_delay=max_delay,
+        )
+
+    def _set_port(self, port: str) -> None:
+        self.port = port
+        self.client = self._build_client()
+
+    @staticmethod
+    def _is_transport_error(e: Exception) -> bool:
+        return isinstance(e, (ConnectionException, OSError)) and not isinstance(e, TimeoutError)
+
     # =========================
     # LEITURA
     # =========================
@@ -86,13 +158,19 @@ class ModbusClientRS485:
                 )
 
                 if resp and not resp.isError():
-                    return list(resp.registers)
+                    registers = list(resp.registers)
+                    self._capture(FC_READ_HOLDING, address, count, registers)
+                    return registers
 
                 last_error = resp
 
             except Exception as e:
+                if self._is_transport_error(e):
+                    raise ModbusTransportError(f"Porta {self.port} perdida: {e}") from e
                 last_error = e
 
+            self._capture(FC_READ_HOLDING | FC_ERROR_FLAG, address, count, [])
+
             self.logger.warning(
                 "Erro Modbus (tentativa %d/%d) addr=%d count=%d",
                 attempt,
@@ -100,9 +178,9 @@ class ModbusClientRS485:
                 address,
                 count,
             )
-            time.sleep(0.1)
+            self.resync()
 
-        raise RuntimeError(
+        raise ModbusProtocolError(
             f"Falha lendo holding registers addr={address} count={count}: {last_error}"
         )
 
@@ -114,14 +192,23 @@ class ModbusClientRS485:
         """
         Escrita de um único WORD (FC06).
         """
-        resp = self.client.write_register(
-            address=address,
-            value=value,
-            slave=self.slave_id,
-        )
+        try:
+            resp = self.client.write_register(
+                address=address,
+                value=value,
+                slave=self.slave_id,
+            )
+        except Exception as e:
+            if self._is_transport_error(e):
+                raise ModbusTransportError(f"Porta {self.port} perdida: {e}") from e
+            resp = None
 
         if resp is None or resp.isError():
-            raise RuntimeError(f"Erro escrevendo register addr={address}")
+            self._capture(FC_WRITE_SINGLE | FC_ERROR_FLAG, address, 1, [value])
+            self.resync()
+            raise ModbusProtocolError(f"Erro escrevendo register addr={address}")
+
+        self._capture(FC_WRITE_SINGLE, address, 1, [value])
 
         self.logger.debug("Write single addr=%d value=%d", address, value)
 
@@ -129,14 +216,23 @@ class ModbusClientRS485:
         """
         Escrita de múltiplos WORDs (FC16).
         """
-        resp = self.client.write_registers(
-            address=address,
-            values=values,
-            slave=self.slave_id,
-        )
+        try:
+            resp = self.client.write_registers(
+                address=address,
+                values=values,
+                slave=self.slave_id,
+            )
+        except Exception as e:
+            if self._is_transport_error(e):
+                raise ModbusTransportError(f"Porta {self.port} perdida: {e}") from e
+            resp = None
 
         if resp is None or resp.isError():
-            raise RuntimeError(f"Erro escrevendo registers addr={address}")
+            self._capture(FC_WRITE_MULTIPLE | FC_ERROR_FLAG, address, len(values), values)
+            self.resync()
+            raise ModbusProtocolError(f"Erro escrevendo registers addr={address}")
+
+        self._capture(FC_WRITE_MULTIPLE, address, len(values), values)
 
         self.logger.debug(
             "Write multiple addr=%d count=%d", address, len(values)
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# =========================
+# PRIORIDADES (menor = antes)
+# =========================
+
+PRIORITY_COMMAND = 0     # escrita de comandos (ex: mdw_command)
+PRIORITY_ALARM = 10      # leitura de alarmes / status
+PRIORITY_NORMAL = 50
+PRIORITY_BULK = 90       # contadores, históricos
+
+
+# =========================
+# REQUISIÇÃO
+# =========================
+
+class _Request:
+    __slots__ = ("fn", "args", "priority", "futures", "read_key", "started")
+
+    def __init__(self, fn: Callable[..., Any], args: Tuple[Any, ...], priority: int, read_key=None):
+        self.fn = fn
+        self.args = args
+        self.priority = priority
+        self.futures: List[Future] = []
+        self.read_key = read_key
+        self.started = False
+
+
+# =========================
+# DISPATCHER
+# =========================
+
+class ModbusDispatcher:
+    """
+    Dono exclusivo do cliente Modbus: uma thread worker executa uma transação
+    por vez, na ordem de prioridade (FIFO dentro da mesma prioridade).
+
+    - Qualquer thread submete requisições e recebe um Future
+    - Leituras pendentes da mesma faixa (address, count) viram uma única
+      transação; o resultado é entregue a todos os Futures. Uma escrita
+      sobreposta enfileirada depois fecha a leitura pendente: leituras
+      novas não pegam carona nela (veriam o valor de antes da escrita)
+    - A preempção acontece entre transações: um comando submetido no meio
+      de um read_profile entra antes da próxima leitura do perfil
+    """
+
+    def __init__(self, client, *, logger: logging.Logger | None = None):
+        self.client = client
+        self.logger = logger or logging.getLogger("modbus-dispatcher")
+
+        self._heap: List[Tuple[int, int, _Request]] = []
+        self._pending_reads: Dict[Tuple[int, int], _Request] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    # =========================
+    # CICLO DE VIDA
+    # =========================
+
+    def start(self) -> "ModbusDispatcher":
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="modbus-dispatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Encerra o worker; requisições ainda na fila falham com RuntimeError."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def __enter__(self) -> "ModbusDispatcher":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # =========================
+    # SUBMISSÃO
+    # =========================
+
+    def _push(self, req: _Request) -> None:
+        heapq.heappush(self._heap, (req.priority, next(self._seq), req))
+        self._cond.notify()
+
+    def submit(self, fn: Callable[..., Any], *args: Any, priority: int = PRIORITY_NORMAL) -> Future:
+        """Executa fn(client, *args) na thread do barramento."""
+        future: Future = Future()
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Dispatcher encerrado")
+            req = _Request(fn, args, priority)
+            req.futures.append(future)
+            self._push(req)
+        return future
+
+    def submit_read(self, address: int, count: int, *, priority: int = PRIORITY_NORMAL) -> Future:
+        """read_holding com coalescência de leituras idênticas pendentes."""
+        future: Future = Future()
+        key = (address, count)
+
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Dispatcher encerrado")
+
+            req = self._pending_reads.get(key)
+            if req is not None:
+                req.futures.append(future)
+                if priority < req.priority:
+                    # sobe a prioridade: reinsere; a entrada antiga é ignorada no pop
+                    req.priority = priority
+                    self._push(req)
+                return future
+
+            req = _Request(_read_holding, key, priority, read_key=key)
+            req.futures.append(future)
+            self._pending_reads[key] = req
+            self._push(req)
+
+        return future
+
+    def _close_reads(self, address: int, count: int) -> None:
+        """Tira da coalescência as leituras pendentes que a escrita sobrepõe."""
+        for key in [k for k in self._pending_reads if k[0] < address + count and address < k[0] + k[1]]:
+            del self._pending_reads[key]
+
+    def submit_write_single(self, address: int, value: int, *, priority: int = PRIORITY_COMMAND) -> Future:
+        with self._cond:
+            self._close_reads(address, 1)
+            return self.submit(_write_single, address, value, priority=priority)
+
+    def submit_write_multiple(self, address: int, values: List[int], *, priority: int = PRIORITY_COMMAND) -> Future:
+        with self._cond:
+            self._close_reads(address, len(values))
+            return self.submit(_write_multiple, address, list(values), priority=priority)
+
+    def proxy(self, priority: int = PRIORITY_NORMAL) -> "DispatchedClient":
+        """Cliente síncrono com a interface do ModbusClientRS485 (para reader/writer)."""
+        return DispatchedClient(self, priority)
+
+    # =========================
+    # WORKER
+    # =========================
+
+    def _next(self) -> Optional[_Request]:
+        with self._cond:
+            while True:
+                if self._stopping:
+                    return None
+                while self._heap:
+                    priority, _, req = heapq.heappop(self._heap)
+                    if req.started or priority != req.priority:
+                        continue  # entrada obsoleta (prioridade foi elevada)
+                    req.started = True
+                    if req.read_key is not None and self._pending_reads.get(req.read_key) is req:
+                        del self._pending_reads[req.read_key]
+                    return req
+                self._cond.wait()
+
+    def _run(self) -> None:
+        while True:
+            req = self._next()
+            if req is None:
+                break
+
+            # descarta waiters que cancelaram; se não sobrou ninguém, nem vai ao barramento
+            req.futures = [f for f in req.futures if f.set_running_or_notify_cancel()]
+            if not req.futures:
+                continue
+
+            try:
+                result = req.fn(self.client, *req.args)
+            except BaseException as e:
+                for future in req.futures:
+                    future.set_exception(e)
+                continue
+
+            for future in req.futures:
+                # cada waiter recebe sua própria cópia da lista de WORDs
+                future.set_result(list(result) if isinstance(result, list) else result)
+
+        self._fail_pending()
+
+    def _fail_pending(self) -> None:
+        with self._cond:
+            pending = [req for _, _, req in self._heap if not req.started]
+            self._heap.clear()
+            self._pending_reads.clear()
+
+        error = RuntimeError("Dispatcher encerrado")
+        for req in pending:
+            req.started = True
+            for future in req.futures:
+                if not future.done():
+                    future.set_exception(error)
+
+
+def _read_holding(client, address: int, count: int) -> List[int]:
+    return client.read_holding(address=address, count=count)
+
+
+def _write_single(client, address: int, value: int) -> None:
+    client.write_single(address=address, value=value)
+
+
+def _write_multiple(client, address: int, values: List[int]) -> None:
+    client.write_multiple(address=address, values=values)
+
+
+# =========================
+# PROXY SÍNCRONO
+# =========================
+
+class DispatchedClient:
+    """
+    Fachada com a interface do ModbusClientRS485 que passa pelo dispatcher.
+    Ex: read_profile(dispatcher.proxy(PRIORITY_BULK), "production", ...)
+    """
+
+    def __init__(self, dispatcher: ModbusDispatcher, priority: int = PRIORITY_NORMAL):
+        self.dispatcher = dispatcher
+        self.priority = priority
+
+    @property
+    def slave_id(self) -> int:
+        return self.dispatcher.client.slave_id
+
+    @property
+    def port(self) -> str:
+        return self.dispatcher.client.port
+
+    def connect(self) -> None:
+        self.dispatcher.submit(lambda client: client.connect(), priority=self.priority).result()
+
+    def close(self) -> None:
+        self.dispatcher.submit(lambda client: client.close(), priority=self.priority).result()
+
+    def read_holding(self, address: int, count: int) -> List[int]:
+        return self.dispatcher.submit_read(address, count, priority=self.priority).result()
+
+    def write_single(self, address: int, value: int) -> None:
+        self.dispatcher.submit_write_single(address, value, priority=self.priority).result()
+
+    def write_multiple(self, address: int, values: List[int]) -> None:
+        self.dispatcher.submit_write_multiple(address, values, priority=self.priority).result()
@@ -0,0 +1,293 @@
+"""
+API HTTP local servida a partir do último snapshot lido (zero Modbus extra).
+
+Rotas
+-----
+• GET /profiles/<nome>        -> {"ts", "version", "values"}      (ETag)
+• GET /registers/<key>        -> {"ts", "version", "value"}       (ETag)
+  ("ts" = momento em que a versão servida foi lida)
+• GET /stream                 -> Server-Sent Events: só keys que mudaram
+• GET /poll?since=<id>        -> long-poll: keys que mudaram desde o id
+
+Versões recomeçam em cada processo: ETags e ids de evento levam a época
+do processo ("<época>-<versão>"). Cursor de outra época (ou de versão
+futura) recebe o snapshot completo.
+
+O JSON de cada perfil/key é serializado uma vez por versão; requisições
+com If-None-Match batendo com a versão atual recebem 304 sem corpo.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+# =========================
+# CONFIG
+# =========================
+
+LONG_POLL_TIMEOUT = 25.0
+SSE_KEEPALIVE = 15.0
+HISTORY_SIZE = 256
+
+
+def _json(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# =========================
+# SNAPSHOT
+# =========================
+
+class SnapshotStore:
+    """
+    Último valor de cada key/perfil, com número de versão global.
+    O loop de polling chama update(); os handlers HTTP só leem.
+    """
+
+    def __init__(self, history: int = HISTORY_SIZE):
+        self._cond = threading.Condition()
+        self.epoch = format(time.time_ns() // 1_000_000, "x")
+        self.version = 0
+
+        self._values: Dict[str, Any] = {}
+        self._key_version: Dict[str, int] = {}
+        self._key_ts: Dict[str, float] = {}
+        self._profiles: Dict[str, Tuple[int, float, List[str]]] = {}
+
+        # (versão, ts, {key: valor}) das últimas mudanças, para stream/long-poll
+        self._history: List[Tuple[int, float, Dict[str, Any]]] = []
+        self._history_size = history
+
+        # corpo JSON pronto por (tipo, nome, versão)
+        self._body_cache: Dict[Tuple[str, str], Tuple[int, bytes]] = {}
+
+    def update(self, profile: str, data: Dict[str, Any], timestamp: float | None = None) -> Dict[str, Any]:
+        """Registra uma leitura; retorna só as keys que mudaram."""
+        ts = time.time() if timestamp is None else timestamp
+
+        with self._cond:
+            changed = {
+                k: v for k, v in data.items()
+                if k not in self._values or self._values[k] != v
+            }
+            prev = self._profiles.get(profile)
+            if not changed and prev is not None and prev[2] == list(data):
+                # nada mudou: nem versão nova, nem notificação
+                return changed
+
+            self.version += 1
+            for k, v in changed.items():
+                self._values[k] = v
+                self._key_version[k] = self.version
+                self._key_ts[k] = ts
+            self._profiles[profile] = (self.version, ts, list(data))
+
+            # toda versão entra no histórico, mesmo sem valor novo (perfil novo)
+            self._history.append((self.version, ts, changed))
+            del self._history[:-self._history_size]
+
+            self._cond.notify_all()
+            return changed
+
+    # =========================
+    # CONSULTA
+    # =========================
+
+    def profile_body(self, name: str) -> Optional[Tuple[int, bytes]]:
+        with self._cond:
+            entry = self._profiles.get(name)
+            if entry is None:
+                return None
+            _, ts, keys = entry
+            # keys compartilhadas (ex: mdw_status) podem ter mudado via outro perfil
+            version = max([entry[0]] + [self._key_version.get(k, 0) for k in keys])
+            ts = max([ts] + [self._key_ts.get(k, 0.0) for k in keys])
+            cached = self._body_cache.get(("p", name))
+            if cached is not None and cached[0] == version:
+                return cached
+            body = _json({"ts": ts, "version": version, "values": {k: self._values.get(k) for k in keys}})
+            self._body_cache[("p", name)] = (version, body)
+            return version, body
+
+    def register_body(self, key: str) -> Optional[Tuple[int, bytes]]:
+        with self._cond:
+            if key not in self._values:
+                return None
+            version = self._key_version[key]
+            cached = self._body_cache.get(("r", key))
+            if cached is not None and cached[0] == version:
+                return cached
+            body = _json({"ts": self._key_ts[key], "version": version, "value": self._values[key]})
+            self._body_cache[("r", key)] = (version, body)
+            return version, body
+
+    def cursor(self, version: int) -> str:
+        return f"{self.epoch}-{version}"
+
+    def changes_since(self, since: int, timeout: float, epoch: str | None = None) -> Tuple[int, Dict[str, Any]]:
+        """
+        Espera (até timeout) por mudanças de valor após `since`.
+        Retorna (versão_atual, {key: valor}). Devolve o snapshot completo se
+        `since` for mais antigo que o histórico guardado, de outra época
+        (processo anterior) ou maior que a versão atual.
+        """
+        deadline = time.monotonic() + timeout
+
+        with self._cond:
+            if (epoch is not None and epoch != self.epoch) or since > self.version:
+                return self.version, dict(self._values)
+
+            while True:
+                if self.version > since:
+                    if not self._history or self._history[0][0] > since + 1:
+                        return self.version, dict(self._values)
+
+                    merged: Dict[str, Any] = {}
+                    for version, _, changed in self._history:
+                        if version > since:
+                            merged.update(changed)
+                    if merged:
+                        return self.version, merged
+                    # só versões sem valor novo: avança o cursor e segue esperando
+                    since = self.version
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return self.version, {}
+                self._cond.wait(remaining)
+
+
+def parse_cursor(text: str) -> Tuple[Optional[str], int]:
+    """"<época>-<versão>" ou só "<versão>" -> (época, versão). ValueError se inválido."""
+    epoch, _, version = text.rpartition("-")
+    if _ and not epoch:
+        raise ValueError(f"cursor inválido: {text!r}")
+    number = int(version)
+    if number < 0:
+        raise ValueError(f"cursor inválido: {text!r}")
+    return epoch or None, number
+
+
+# =========================
+# HANDLER HTTP
+# =========================
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "modbus-client"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def store(self) -> SnapshotStore:
+        return self.server.store
+
+    def log_message(self, fmt: str, *args) -> None:
+        self.server.logger.debug("%s - " + fmt, self.address_string(), *args)
+
+    def _send(self, status: int, body: bytes = b"", *, etag: str | None = None, content_type: str = "application/json") -> None:
+        self.send_response(status)
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if status != 304:
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304 and body:
+            self.wfile.write(body)
+
+    def _send_versioned(self, entry: Optional[Tuple[int, bytes]], what: str) -> None:
+        if entry is None:
+            self._send(404, _json({"error": f"{what} sem dados"}))
+            return
+        version, body = entry
+        etag = f'"{self.store.cursor(version)}"'
+        if etag in self.headers.get("If-None-Match", ""):
+            self._send(304, etag=etag)
+            return
+        self._send(200, body, etag=etag)
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = parse_qs(url.query)
+
+        if len(parts) == 2 and parts[0] == "profiles":
+            self._send_versioned(self.store.profile_body(parts[1]), f"perfil {parts[1]!r}")
+        elif len(parts) == 2 and parts[0] == "registers":
+            self._send_versioned(self.store.register_body(parts[1]), f"key {parts[1]!r}")
+        elif parts == ["poll"]:
+            cursor = self._cursor(query.get("since", ["0"])[0])
+            if cursor is None:
+                return
+            version, changed = self.store.changes_since(cursor[1], LONG_POLL_TIMEOUT, cursor[0])
+            self._send(200, _json({"id": self.store.cursor(version), "version": version, "changed": changed}))
+        elif parts == ["stream"]:
+            cursor = self._cursor(self.headers.get("Last-Event-ID") or query.get("since", ["0"])[0])
+            if cursor is None:
+                return
+            self._stream(*cursor)
+        else:
+            self._send(404, _json({"error": "rota inválida"}))
+
+    def _cursor(self, text: str) -> Optional[Tuple[Optional[str], int]]:
+        try:
+            return parse_cursor(text)
+        except ValueError:
+            self._send(400, _json({"error": f"since/Last-Event-ID inválido: {text!r}"}))
+            return None
+
+    def _stream(self, epoch: Optional[str], since: int) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        try:
+            while not self.server.stopping:
+                version, changed = self.store.changes_since(since, SSE_KEEPALIVE, epoch)
+                if changed or epoch != self.store.epoch or version < since:
+                    event_id = self.store.cursor(version).encode("ascii")
+                    self.wfile.write(b"id: " + event_id + b"\ndata: " + _json(changed) + b"\n\n")
+                else:
+                    self.wfile.write(b": keepalive\n\n")
+                epoch, since = self.store.epoch, version
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+# =========================
+# SERVIDOR
+# =========================
+
+class SnapshotServer(ThreadingHTTPServer):
+    """Servidor HTTP em thread própria; não toca no barramento."""
+
+    daemon_threads = True
+
+    def __init__(self, store: SnapshotStore, host: str = "127.0.0.1", port: int = 8080, *, logger: logging.Logger | None = None):
+        super().__init__((host, port), _Handler)
+        self.store = store
+        self.stopping = False
+        self.logger = logger or logging.getLogger("modbus-http")
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SnapshotServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="modbus-http", daemon=True)
+        self._thread.start()
+        self.logger.info("API HTTP em http://%s:%d", *self.server_address[:2])
+        return self
+
+    def stop(self) -> None:
+        self.stopping = True
+        self.shutdown()
+        self.server_close()
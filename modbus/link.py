@@ -0,0 +1,152 @@
+"""
+Classificação de falhas do link serial e recuperação de porta.
+
+• ModbusProtocolError  -> CRC, timeout, frame truncado.
+                          A porta continua boa: ressincroniza no lugar
+                          (limpa buffer de entrada + silêncio entre frames).
+• ModbusExceptionResponse (subclasse) -> o escravo respondeu fc|0x80
+                          (ex: código 2 = endereço ilegal). Resposta
+                          determinística de link saudável: sem retry.
+• ModbusTransportError -> porta perdida (adaptador USB removido, erro de I/O).
+                          Exige reconnect, com backoff limitado e detecção
+                          de re-enumeração (ex: /dev/ttyUSB0 -> /dev/ttyUSB1).
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Callable, Dict, Iterator, Optional
+
+
+# =========================
+# ERROS
+# =========================
+
+class ModbusProtocolError(RuntimeError):
+    pass
+
+
+class ModbusExceptionResponse(ModbusProtocolError):
+    def __init__(self, function: int, code: int):
+        super().__init__(f"Exceção Modbus fc=0x{function:02X} código={code}")
+        self.function = function
+        self.code = code
+
+
+class ModbusTransportError(ConnectionError):
+    pass
+
+
+# =========================
+# BACKOFF
+# =========================
+
+def backoff_delays(base: float = 0.5, maximum: float = 10.0, attempts: int = 0) -> Iterator[float]:
+    """Atrasos exponenciais limitados a `maximum`; attempts=0 = infinito."""
+    n = 0
+    while attempts <= 0 or n < attempts:
+        yield min(maximum, base * (2 ** n))
+        n += 1
+
+
+# =========================
+# IDENTIDADE DA PORTA
+# =========================
+
+def port_identity(port: str) -> Optional[Dict[str, object]]:
+    """
+    Identidade de hardware do adaptador (serial_number, vid, pid, location),
+    usada para reencontrá-lo se o SO renomear a porta.
+    """
+    try:
+        from serial.tools import list_ports
+    except ImportError:
+        return None
+
+    for info in list_ports.comports():
+        if info.device == port:
+            return {
+                "serial_number": info.serial_number,
+                "vid": info.vid,
+                "pid": info.pid,
+                "location": info.location,
+            }
+    return None
+
+
+def find_port(identity: Optional[Dict[str, object]], fallback: str) -> str:
+    """Porta atual do adaptador com a identidade dada (ou `fallback`)."""
+    if not identity:
+        return fallback
+
+    try:
+        from serial.tools import list_ports
+    except ImportError:
+        return fallback
+
+    candidates = list(list_ports.comports())
+
+    # 1) número de série é o critério mais forte
+    if identity.get("serial_number"):
+        for info in candidates:
+            if info.serial_number == identity["serial_number"]:
+                return info.device
+
+    # 2) mesmo VID:PID na mesma posição física do hub
+    for info in candidates:
+        if (info.vid, info.pid, info.location) == (identity.get("vid"), identity.get("pid"), identity.get("location")):
+            if info.vid is not None:
+                return info.device
+
+    return fallback
+
+
+def port_present(port: str) -> bool:
+    """Em POSIX a porta é um arquivo em /dev; no Windows (COMx) assume presente."""
+    if port.startswith("/dev/"):
+        return os.path.exists(port)
+    return True
+
+
+# =========================
+# RECONEXÃO
+# =========================
+
+def reconnect_port(
+    client,
+    identity: Optional[Dict[str, object]],
+    set_port: Callable[[str], None],
+    *,
+    attempts: int = 0,
+    base_delay: float = 0.5,
+    max_delay: float = 10.0,
+) -> None:
+    """
+    Reabre a porta de `client` (port, logger, close(), connect()) após perda
+    real. Backoff exponencial limitado a max_delay; attempts=0 tenta para
+    sempre. Se o adaptador voltar com outro nome, chama set_port(novo_nome).
+    """
+    try:
+        client.close()
+    except Exception:
+        pass
+
+    last_error = None
+    for delay in backoff_delays(base_delay, max_delay, attempts):
+        port = find_port(identity, client.port)
+        if port != client.port:
+            client.logger.warning("Adaptador re-enumerado: %s -> %s", client.port, port)
+            set_port(port)
+
+        if port_present(client.port):
+            try:
+                client.connect()
+                return
+            except ModbusTransportError as e:
+                last_error = e
+
+        client.logger.warning("Porta %s indisponível, nova tentativa em %.1fs", client.port, delay)
+        time.sleep(delay)
+
+    raise ModbusTransportError(f"Não foi possível reconectar em {client.port}: {last_error}")
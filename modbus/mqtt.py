@@ -0,0 +1,348 @@
+"""
+Publicação MQTT dos dados lidos (sink do loop de polling).
+
+Modos
+-----
+• per_key : um tópico por variável       -> <base>/<key>
+            {"ts": ..., "value": ...} (só fmt="json")
+• packed  : um payload por perfil        -> <base>/<profile>
+            fmt="json"   {"ts": ..., "values": {...}}
+            fmt="binary" <d H> ts, n + n × f64 na ordem das keys do
+                         perfil (NaN = leitura falhou; bits = WORD inteiro)
+
+publish() só enfileira: formatação e envio rodam numa thread própria, então
+o custo no loop do barramento é um append. Durante quedas do broker as
+mensagens ficam num buffer em memória; o excedente vai para um spool em
+disco (JSON lines) e é reenviado em lotes quando a conexão volta.
+Requer paho-mqtt, a menos que um cliente substituto seja injetado.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import math
+import os
+import struct
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from modbus.reader import encode_bits
+from modbus.registers import REGISTERS
+
+
+# =========================
+# CONFIG
+# =========================
+
+PACKED_HEADER = struct.Struct("<dH")
+
+MODES = ("per_key", "packed")
+FORMATS = ("json", "binary")
+
+Message = Tuple[str, bytes]
+
+
+# =========================
+# CODIFICAÇÃO
+# =========================
+
+def _json(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _numeric(key: str, value: Any, registers: Dict[str, Dict[str, Any]]) -> float:
+    if value is None:
+        return math.nan
+    if isinstance(value, dict):
+        return float(encode_bits(value, registers[key].get("bits", {})))
+    return float(value)
+
+
+def pack_binary(timestamp: float, keys: Sequence[str], data: Dict[str, Any], registers: Dict[str, Dict[str, Any]] = REGISTERS) -> bytes:
+    values = [_numeric(k, data.get(k), registers) for k in keys]
+    return PACKED_HEADER.pack(timestamp, len(values)) + struct.pack(f"<{len(values)}d", *values)
+
+
+def unpack_binary(payload: bytes, keys: Sequence[str]) -> Tuple[float, Dict[str, Optional[float]]]:
+    """Inverso de pack_binary (para consumidores em Python)."""
+    ts, n = PACKED_HEADER.unpack_from(payload)
+    values = struct.unpack_from(f"<{n}d", payload, PACKED_HEADER.size)
+    return ts, {k: (None if math.isnan(v) else v) for k, v in zip(keys, values)}
+
+
+# =========================
+# SINK
+# =========================
+
+class MqttSink:
+    """Conexão persistente com o broker + fila com buffer/spool para quedas."""
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 1883,
+        *,
+        base_topic: str = "mdw",
+        mode: str = "per_key",
+        fmt: str = "json",
+        retain: bool = True,
+        qos: int = 0,
+        only_changed: bool = True,
+        client_id: str = "",
+        username: str | None = None,
+        password: str | None = None,
+        client=None,
+        max_buffer: int = 10000,
+        spool_path: str | None = None,
+        batch_size: int = 200,
+        retry_interval: float = 1.0,
+        registers: Dict[str, Dict[str, Any]] = REGISTERS,
+        profiles: Dict[str, List[str]] | None = None,
+        logger: logging.Logger | None = None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"mode inválido: {mode!r}. Use {MODES}")
+        if fmt not in FORMATS:
+            raise ValueError(f"fmt inválido: {fmt!r}. Use {FORMATS}")
+        if mode == "per_key" and fmt != "json":
+            raise ValueError("mode='per_key' só suporta fmt='json'")
+
+        self.host = host
+        self.port = port
+        self.base_topic = base_topic.rstrip("/")
+        self.mode = mode
+        self.fmt = fmt
+        self.retain = retain
+        self.qos = qos
+        self.only_changed = only_changed
+        self.max_buffer = max_buffer
+        self.spool_path = spool_path
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+        self.registers = registers
+        self.profiles = profiles
+        self.logger = logger or logging.getLogger("modbus-mqtt")
+
+        self._credentials = (username, password)
+        self._client_id = client_id
+        self._client = client
+        self._owns_client = client is None
+        self._connected = threading.Event()
+        if client is not None:
+            self._connected.set()  # substituto injetado: conexão é do chamador
+
+        self._samples: Deque[Tuple[str, Dict[str, Any], float]] = deque()
+        self._outbox: Deque[Message] = deque()
+        self._last: Dict[str, Any] = {}
+        self._spool_offset = 0
+
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    # =========================
+    # CICLO DE VIDA
+    # =========================
+
+    def _build_client(self):
+        try:
+            import paho.mqtt.client as mqtt
+        except ImportError:
+            raise ImportError("MqttSink requer paho-mqtt (pip install paho-mqtt)") from None
+
+        if hasattr(mqtt, "CallbackAPIVersion"):  # paho-mqtt >= 2.0
+            client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=self._client_id)
+        else:
+            client = mqtt.Client(client_id=self._client_id)
+
+        username, password = self._credentials
+        if username:
+            client.username_pw_set(username, password)
+
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.reconnect_delay_set(min_delay=1, max_delay=30)
+        client.connect_async(self.host, self.port, keepalive=30)
+        client.loop_start()
+        return client
+
+    def _on_connect(self, client, userdata, flags, rc, *args) -> None:
+        if getattr(rc, "is_failure", False) or (isinstance(rc, int) and rc != 0):
+            self.logger.warning("Broker recusou a conexão: %s", rc)
+            return
+        self.logger.info("Conectado ao broker MQTT %s:%d", self.host, self.port)
+        self._connected.set()
+        with self._cond:
+            self._cond.notify()
+
+    def _on_disconnect(self, client, userdata, *args) -> None:
+        self.logger.warning("Desconectado do broker MQTT")
+        self._connected.clear()
+
+    def start(self) -> "MqttSink":
+        if self._client is None:
+            self._client = self._build_client()
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="modbus-mqtt", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        """Tenta esvaziar a fila; o que não sair vai para o spool (se configurado)."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+
+        if self._thread is not None:
+            # o worker faz o último envio e o spool; buffer é só dele
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                self.logger.warning("Thread MQTT não terminou em %.1fs; segue em segundo plano", timeout)
+                return
+            self._thread = None
+        else:
+            self._drain()
+
+        if self._owns_client and self._client is not None:
+            self._client.loop_stop()
+            self._client.disconnect()
+            self._client = None
+
+    def __enter__(self) -> "MqttSink":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # =========================
+    # ENTRADA (thread do barramento)
+    # =========================
+
+    def publish(self, profile: str, data: Dict[str, Any], timestamp: float | None = None) -> None:
+        """Enfileira uma amostra. Não bloqueia e não formata nada."""
+        ts = time.time() if timestamp is None else timestamp
+        with self._cond:
+            self._samples.append((profile, data, ts))
+            self._cond.notify()
+
+    # =========================
+    # FORMATAÇÃO
+    # =========================
+
+    def _messages(self, profile: str, data: Dict[str, Any], ts: float) -> List[Message]:
+        if self.mode == "per_key":
+            out: List[Message] = []
+            for key, value in data.items():
+                if self.only_changed and key in self._last and self._last[key] == value:
+                    continue
+                self._last[key] = value
+                out.append((f"{self.base_topic}/{key}", _json({"ts": ts, "value": value})))
+            return out
+
+        topic = f"{self.base_topic}/{profile}"
+        if self.fmt == "binary":
+            keys = self.profiles[profile] if self.profiles and profile in self.profiles else list(data)
+            return [(topic, pack_binary(ts, keys, data, self.registers))]
+        return [(topic, _json({"ts": ts, "values": data}))]
+
+    def _format_pending(self) -> None:
+        with self._cond:
+            samples = list(self._samples)
+            self._samples.clear()
+
+        for sample in samples:
+            self._outbox.extend(self._messages(*sample))
+
+        overflow = len(self._outbox) - self.max_buffer
+        if overflow > 0:
+            if self.spool_path:
+                self._spill(overflow)
+            else:
+                prefix = self.base_topic + "/"
+                for _ in range(overflow):
+                    topic, _payload = self._outbox.popleft()
+                    # mudança descartada: esquece o último valor para a key
+                    # ser republicada na próxima amostra (retained correto)
+                    if self.mode == "per_key":
+                        self._last.pop(topic[len(prefix):], None)
+                self.logger.warning("Buffer MQTT cheio: %d mensagens descartadas", overflow)
+
+    # =========================
+    # SPOOL EM DISCO
+    # =========================
+
+    def _drain(self) -> None:
+        """Leva ao spool o que não foi enviado (no encerramento)."""
+        self._format_pending()
+        if self._outbox and self.spool_path:
+            self._spill(len(self._outbox))
+
+    def _spill(self, n: int) -> None:
+        """Move as n mensagens mais antigas do buffer para o fim do spool."""
+        with open(self.spool_path, "ab") as f:
+            for _ in range(n):
+                topic, payload = self._outbox.popleft()
+                item = {"t": topic, "p": base64.b64encode(payload).decode("ascii")}
+                f.write(_json(item) + b"\n")
+
+    def _send_spool(self) -> bool:
+        """
+        Reenvia o spool (mensagens mais antigas) antes do buffer em memória,
+        retomando do último offset confirmado. True = spool vazio.
+        """
+        if not self.spool_path or not os.path.exists(self.spool_path):
+            return True
+
+        with open(self.spool_path, "rb") as f:
+            f.seek(self._spool_offset)
+            for line in iter(f.readline, b""):
+                if line.strip():
+                    item = json.loads(line)
+                    if not self._publish(item["t"], base64.b64decode(item["p"])):
+                        return False
+                self._spool_offset = f.tell()
+
+        os.remove(self.spool_path)
+        self._spool_offset = 0
+        return True
+
+    # =========================
+    # ENVIO
+    # =========================
+
+    def _publish(self, topic: str, payload: bytes) -> bool:
+        info = self._client.publish(topic, payload, qos=self.qos, retain=self.retain)
+        return getattr(info, "rc", 0) == 0
+
+    def _send_batch(self) -> bool:
+        """Envia até batch_size mensagens do buffer. False se o broker recusou."""
+        for _ in range(min(self.batch_size, len(self._outbox))):
+            topic, payload = self._outbox[0]
+            if not self._publish(topic, payload):
+                return False
+            self._outbox.popleft()
+        return True
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._samples and not self._stopping:
+                    # acorda com publish/connect/stop, ou no timeout para nova tentativa
+                    self._cond.wait(self.retry_interval)
+                stopping = self._stopping
+
+            self._format_pending()
+
+            if self._connected.is_set() and self._send_spool():
+                while self._outbox:
+                    if not self._send_batch():
+                        break  # broker indisponível: mantém no buffer e tenta depois
+
+            if stopping:
+                self._drain()
+                return
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
 from typing import Any, Dict, List, Tuple, Optional
 
+from modbus.link import ModbusTransportError
 from modbus.registers import REGISTERS  # 
 
 # =========================
@@ -45,6 +45,15 @@ def decode_bits(word: int, bit_map: Dict[int, str]) -> Dict[str, bool]:
     return out
 
 
+def encode_bits(bits: Dict[str, bool], bit_map: Dict[int, str]) -> int:
+    """Inverso de decode_bits: dict nome_do_bit -> bool vira WORD."""
+    word = 0
+    for bit, name in bit_map.items():
+        if bits.get(name):
+            word |= 1 << bit
+    return word
+
+
 def decode_u32(words: List[int], order: str) -> int:
     """Decodifica DWORD (2 WORDs) para uint32."""
     if len(words) != 2:
@@ -62,6 +71,20 @@ def decode_u32(words: List[int], order: str) -> int:
     return (hi << 16) | lo
 
 
+def encode_u32(value: int, order: str) -> List[int]:
+    """Codifica uint32 em 2 WORDs (inverso de decode_u32)."""
+    if not 0 <= value <= 0xFFFFFFFF:
+        raise ValueError(f"Valor fora da faixa u32: {value}")
+
+    hi, lo = (value >> 16) & 0xFFFF, value & 0xFFFF
+
+    if order.upper() == "HI_LO":
+        return [hi, lo]
+    if order.upper() == "LO_HI":
+        return [lo, hi]
+    raise ValueError("DWORD_ORDER inválido. Use 'HI_LO' ou 'LO_HI'.")
+
+
 def _read_holding_registers(client, address: int, count: int, slave_id: int) -> List[int]:
     """Leitura crua (holding registers)."""
     return client.read_holding(address=address, count=count)
@@ -71,9 +94,16 @@ def _read_holding_registers(client, address: int, count: int, slave_id: int) ->
 # LEITURA POR VARIÁVEL
 # =========================
 
-def read_one(client, key: str, *, base_address: int = 0, slave_id: int = 1) -> Any:
-    """Lê uma variável pelo key do REGISTERS."""
-    spec = REGISTERS[key]
+def read_one(
+    client,
+    key: str,
+    *,
+    base_address: int = 0,
+    slave_id: int = 1,
+    registers: Dict[str, Dict[str, Any]] = REGISTERS,
+) -> Any:
+    """Lê uma variável pelo key do REGISTERS (ou de um mapa externo)."""
+    spec = registers[key]
     offset = spec["offset"]
     rtype = spec["type"]
 
@@ -100,7 +130,7 @@ def read_one(client, key: str, *, base_address: int = 0, slave_id: int = 1) -> A
 # LEITURA EM BLOCO (PERFORMANCE)
 # =========================
 
-def _calc_word_span(keys: List[str]) -> Tuple[int, int]:
+def _calc_word_span(keys: List[str], registers: Dict[str, Dict[str, Any]] = REGISTERS) -> Tuple[int, int]:
     """
     Calcula a faixa mínima [min_offset, max_offset_inclusive] em WORDs,
     considerando u16 (1 word) e u32 (2 words).
@@ -109,7 +139,7 @@ def _calc_word_span(keys: List[str]) -> Tuple[int, int]:
     max_off = None
 
     for k in keys:
-        s = REGISTERS[k]
+        s = registers[k]
         off = int(s["offset"])
         size = 2 if s["type"] == "u32" else 1
 
@@ -124,7 +154,14 @@ def _calc_word_span(keys: List[str]) -> Tuple[int, int]:
     return min_off, max_off
 
 
-def read_many_block(client, keys: List[str], *, base_address: int = 0, slave_id: int = 1) -> Dict[str, Any]:
+def read_many_block(
+    client,
+    keys: List[str],
+    *,
+    base_address: int = 0,
+    slave_id: int = 1,
+    registers: Dict[str, Dict[str, Any]] = REGISTERS,
+) -> Dict[str, Any]:
     """
     Lê várias variáveis individualmente (modo seguro).
     Equipamentos com endereços não-contíguos podem falhar em leitura de bloco.
@@ -133,7 +170,10 @@ def read_many_block(client, keys: List[str], *, base_address: int = 0, slave_id:
     
     for k in keys:
         try:
-            out[k] = read_one(client, k, base_address=base_address, slave_id=slave_id)
+            out[k] = read_one(client, k, base_address=base_address, slave_id=slave_id, registers=registers)
+        except ModbusTransportError:
+            # porta perdida: não adianta tentar as demais keys
+            raise
         except Exception as e:
             # Se falhar, registra mas continua com as outras
             out[k] = None
@@ -185,8 +225,22 @@ PROFILES: Dict[str, List[str]] = {
 }
 
 
-def read_profile(client, profile: str, *, base_address: int = 0, slave_id: int = 1) -> Dict[str, Any]:
-    keys = PROFILES.get(profile)
+def read_profile(
+    client,
+    profile: str,
+    *,
+    base_address: int = 0,
+    slave_id: int = 1,
+    regmap=None,
+) -> Dict[str, Any]:
+    """
+    Lê um perfil. regmap (modbus.regmap.RegisterMap) troca o mapa embutido
+    por um mapa externo carregado de arquivo.
+    """
+    profiles = PROFILES if regmap is None else regmap.profiles
+    registers = REGISTERS if regmap is None else regmap.registers
+
+    keys = profiles.get(profile)
     if not keys:
-        raise ValueError(f"Perfil inválido: {profile}. Disponíveis: {list(PROFILES)}")
-    return read_many_block(client, keys, base_address=base_address, slave_id=slave_id)
+        raise ValueError(f"Perfil inválido: {profile}. Disponíveis: {list(profiles)}")
+    return read_many_block(client, keys, base_address=base_address, slave_id=slave_id, registers=registers)
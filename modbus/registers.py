@@ -191,19 +191,73 @@ REGISTERS = {
         "offset": 51,
         "type": "u16",
         "rw": "R",
-        "description": "Alarmes A01–A16"
+        "description": "Alarmes A01–A16",
+        "bits": {
+            0: "a01",
+            1: "a02",
+            2: "a03",
+            3: "a04",
+            4: "a05",
+            5: "a06",
+            6: "a07",
+            7: "a08",
+            8: "a09",
+            9: "a10",
+            10: "a11",
+            11: "a12",
+            12: "a13",
+            13: "a14",
+            14: "a15",
+            15: "a16",
+        }
     },
     "alarms_word_2": {
         "offset": 52,
         "type": "u16",
         "rw": "R",
-        "description": "Alarmes A17–A32"
+        "description": "Alarmes A17–A32",
+        "bits": {
+            0: "a17",
+            1: "a18",
+            2: "a19",
+            3: "a20",
+            4: "a21",
+            5: "a22",
+            6: "a23",
+            7: "a24",
+            8: "a25",
+            9: "a26",
+            10: "a27",
+            11: "a28",
+            12: "a29",
+            13: "a30",
+            14: "a31",
+            15: "a32",
+        }
     },
     "alarms_word_3": {
         "offset": 53,
         "type": "u16",
         "rw": "R",
-        "description": "Alarmes A33–A48"
+        "description": "Alarmes A33–A48",
+        "bits": {
+            0: "a33",
+            1: "a34",
+            2: "a35",
+            3: "a36",
+            4: "a37",
+            5: "a38",
+            6: "a39",
+            7: "a40",
+            8: "a41",
+            9: "a42",
+            10: "a43",
+            11: "a44",
+            12: "a45",
+            13: "a46",
+            14: "a47",
+            15: "a48",
+        }
     },
 
     # =========================
@@ -215,12 +269,48 @@ REGISTERS = {
         "type": "u16",
         "rw": "R",
         "description": "Entradas digitais",
+        "bits": {
+            0: "di_01",
+            1: "di_02",
+            2: "di_03",
+            3: "di_04",
+            4: "di_05",
+            5: "di_06",
+            6: "di_07",
+            7: "di_08",
+            8: "di_09",
+            9: "di_10",
+            10: "di_11",
+            11: "di_12",
+            12: "di_13",
+            13: "di_14",
+            14: "di_15",
+            15: "di_16",
+        }
     },
     "digital_outputs": {
         "offset": 55,
         "type": "u16",
         "rw": "R",
         "description": "Saídas digitais",
+        "bits": {
+            0: "do_01",
+            1: "do_02",
+            2: "do_03",
+            3: "do_04",
+            4: "do_05",
+            5: "do_06",
+            6: "do_07",
+            7: "do_08",
+            8: "do_09",
+            9: "do_10",
+            10: "do_11",
+            11: "do_12",
+            12: "do_13",
+            13: "do_14",
+            14: "do_15",
+            15: "do_16",
+        }
     },
 }
 # =========================
\ No newline at end of file
@@ -0,0 +1,304 @@
+"""
+Mapas de registradores declarativos (JSON / YAML / CSV) por tipo de equipamento.
+
+Formato JSON/YAML
+-----------------
+    {
+      "name": "piovan_mdw",
+      "registers": {
+        "station_1_setpoint": {"offset": 9, "type": "u16", "decimals": 1,
+                               "unit": "%", "rw": "R/W"},
+        "mdw_status": {"offset": 50, "type": "u16", "bits": {"0": "stop", "1": "run"}}
+      },
+      "profiles": {"basic": ["station_1_setpoint", "mdw_status"]}
+    }
+
+Formato CSV (uma linha por registrador)
+---------------------------------------
+    key,offset,type,decimals,unit,rw,description,bits,profiles
+    mdw_status,50,u16,,,R,Status geral,0:stop;1:run,basic;alarms
+
+O mapa é validado e compilado uma vez num índice ordenado por offset.
+A versão validada fica em cache (JSON só com dados, em __pycache__/ ao
+lado do arquivo), invalidada por mtime/tamanho do arquivo de origem;
+cache ilegível ou corrompido é tratado como ausente.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from modbus.reader import PROFILES
+from modbus.registers import REGISTERS
+
+
+# =========================
+# CONFIG
+# =========================
+
+TYPE_WORDS = {"u16": 1, "u32": 2}
+VALID_RW = {"R", "W", "R/W"}
+
+CACHE_DIR = "__pycache__"
+CACHE_VERSION = 2
+
+
+# =========================
+# ÍNDICE POR OFFSET
+# =========================
+
+class RegisterIndex:
+    """
+    Intervalos [offset, offset + words) ordenados por offset.
+    Busca por bisect: O(log n) por lookup e O(log n + k) por faixa.
+    """
+
+    def __init__(self, registers: Dict[str, Dict[str, Any]]):
+        items = sorted(
+            (int(spec["offset"]), int(spec["offset"]) + TYPE_WORDS[spec["type"]], key)
+            for key, spec in registers.items()
+        )
+        self.starts: List[int] = [s for s, _, _ in items]
+        self.ends: List[int] = [e for _, e, _ in items]
+        self.keys: List[str] = [k for _, _, k in items]
+
+        # maior fim até cada posição: permite achar intervalos que cobrem um ponto
+        self._max_end: List[int] = []
+        running = -1
+        for end in self.ends:
+            running = max(running, end)
+            self._max_end.append(running)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def overlaps(self) -> List[Tuple[str, str]]:
+        """Pares de keys cujos WORDs se sobrepõem."""
+        out: List[Tuple[str, str]] = []
+        for i in range(1, len(self.keys)):
+            j = i - 1
+            while j >= 0 and self._max_end[j] > self.starts[i]:
+                if self.ends[j] > self.starts[i]:
+                    out.append((self.keys[j], self.keys[i]))
+                j -= 1
+        return out
+
+    def key_at(self, offset: int) -> Optional[str]:
+        """Key que contém o offset (ou None)."""
+        keys = self.range(offset, offset + 1)
+        return keys[0] if keys else None
+
+    def range(self, lo: int, hi: int) -> List[str]:
+        """Keys com algum WORD em [lo, hi), em ordem de offset."""
+        stop = bisect_left(self.starts, hi)
+        start = bisect_right(self._max_end, lo)
+        return [self.keys[i] for i in range(start, stop) if self.ends[i] > lo]
+
+    def span(self, keys: List[str]) -> Tuple[int, int]:
+        """Faixa [min_offset, max_offset_inclusive] em WORDs das keys."""
+        pos = {k: i for i, k in enumerate(self.keys)}
+        idx = [pos[k] for k in keys]
+        if not idx:
+            raise ValueError("keys vazio")
+        return min(self.starts[i] for i in idx), max(self.ends[i] for i in idx) - 1
+
+
+# =========================
+# MAPA COMPILADO
+# =========================
+
+class RegisterMap:
+    """Registradores + perfis de um tipo de equipamento, já validados e indexados."""
+
+    def __init__(
+        self,
+        registers: Dict[str, Dict[str, Any]],
+        profiles: Dict[str, List[str]],
+        *,
+        name: str = "",
+    ):
+        self.name = name
+        self.registers = registers
+        self.profiles = profiles
+        self.index = RegisterIndex(registers)
+
+    def __repr__(self) -> str:
+        return f"RegisterMap({self.name!r}, registers={len(self.registers)}, profiles={list(self.profiles)})"
+
+
+def validate(registers: Dict[str, Dict[str, Any]], profiles: Dict[str, List[str]]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, List[str]]]:
+    """Normaliza tipos (bits com chave int, offset int) e valida o mapa."""
+    out: Dict[str, Dict[str, Any]] = {}
+
+    for key, raw in registers.items():
+        spec = dict(raw)
+        try:
+            spec["offset"] = int(spec["offset"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"offset inválido (key={key})") from None
+        if spec["offset"] < 0:
+            raise ValueError(f"offset negativo (key={key})")
+
+        spec.setdefault("type", "u16")
+        if spec["type"] not in TYPE_WORDS:
+            raise ValueError(f"Tipo não suportado: {spec['type']!r} (key={key})")
+
+        spec.setdefault("rw", "R")
+        if spec["rw"] not in VALID_RW:
+            raise ValueError(f"rw inválido: {spec['rw']!r} (key={key})")
+
+        if spec.get("decimals") in (None, ""):
+            spec.pop("decimals", None)
+        else:
+            spec["decimals"] = int(spec["decimals"])
+
+        if "bits" in spec:
+            bits = {int(bit): str(name) for bit, name in spec["bits"].items()}
+            if any(not 0 <= b < 16 * TYPE_WORDS[spec["type"]] for b in bits):
+                raise ValueError(f"Bit fora da faixa (key={key})")
+            spec["bits"] = bits
+
+        out[key] = spec
+
+    index = RegisterIndex(out)
+    overlaps = index.overlaps()
+    if overlaps:
+        raise ValueError(f"Registradores sobrepostos: {overlaps}")
+
+    profiles = {name: list(keys) for name, keys in profiles.items()}
+    for name, keys in profiles.items():
+        missing = [k for k in keys if k not in out]
+        if missing:
+            raise ValueError(f"Perfil {name!r} referencia keys inexistentes: {missing}")
+
+    return out, profiles
+
+
+# =========================
+# LEITURA DOS ARQUIVOS
+# =========================
+
+def _load_json(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_yaml(path: str) -> Dict[str, Any]:
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError("Mapas YAML requerem PyYAML (pip install pyyaml)") from None
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def _load_csv(path: str) -> Dict[str, Any]:
+    registers: Dict[str, Dict[str, Any]] = {}
+    profiles: Dict[str, List[str]] = {}
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            key = (row.pop("key", None) or "").strip()
+            if not key or key.startswith("#"):
+                continue
+
+            bits = (row.pop("bits", None) or "").strip()
+            for name in (row.pop("profiles", None) or "").split(";"):
+                if name.strip():
+                    profiles.setdefault(name.strip(), []).append(key)
+
+            spec: Dict[str, Any] = {k: v.strip() for k, v in row.items() if k and v and v.strip()}
+            if bits:
+                spec["bits"] = dict(item.split(":", 1) for item in bits.split(";") if item)
+            registers[key] = spec
+
+    return {"name": os.path.splitext(os.path.basename(path))[0], "registers": registers, "profiles": profiles}
+
+
+LOADERS = {
+    ".json": _load_json,
+    ".yaml": _load_yaml,
+    ".yml": _load_yaml,
+    ".csv": _load_csv,
+}
+
+
+def _cache_path(path: str) -> str:
+    folder = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    return os.path.join(folder, os.path.basename(path) + ".regmap")
+
+
+def _source_stamp(path: str) -> Tuple[int, int, int]:
+    st = os.stat(path)
+    return CACHE_VERSION, st.st_mtime_ns, st.st_size
+
+
+def compile_map(path: str) -> RegisterMap:
+    """Lê, valida e compila o mapa (sem cache)."""
+    ext = os.path.splitext(path)[1].lower()
+    loader = LOADERS.get(ext)
+    if loader is None:
+        raise ValueError(f"Formato de mapa não suportado: {ext!r}. Use {sorted(LOADERS)}")
+
+    doc = loader(path)
+    registers, profiles = validate(doc.get("registers") or {}, doc.get("profiles") or {})
+    name = doc.get("name") or os.path.splitext(os.path.basename(path))[0]
+    return RegisterMap(registers, profiles, name=name)
+
+
+def _read_cache(cache: str, stamp: Tuple[int, int, int]) -> Optional[RegisterMap]:
+    try:
+        with open(cache, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+        if tuple(doc["stamp"]) != stamp:
+            return None
+        registers = doc["registers"]
+        for spec in registers.values():
+            if "bits" in spec:
+                # JSON só tem chaves str: volta o número do bit para int
+                spec["bits"] = {int(bit): name for bit, name in spec["bits"].items()}
+        return RegisterMap(registers, doc["profiles"], name=doc["name"])
+    except Exception:
+        return None  # qualquer problema no cache = recompila do arquivo de origem
+
+
+def load_register_map(path: str, *, use_cache: bool = True) -> RegisterMap:
+    """Carrega o mapa validado do cache se o arquivo de origem não mudou."""
+    stamp = _source_stamp(path)
+    cache = _cache_path(path)
+
+    if use_cache:
+        regmap = _read_cache(cache, stamp)
+        if regmap is not None:
+            return regmap
+
+    regmap = compile_map(path)
+
+    if use_cache:
+        doc = {"stamp": stamp, "name": regmap.name, "registers": regmap.registers, "profiles": regmap.profiles}
+        try:
+            os.makedirs(os.path.dirname(cache), exist_ok=True)
+            tmp = cache + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(doc, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, cache)
+        except OSError:
+            pass  # diretório somente leitura: segue sem cache
+
+    return regmap
+
+
+_DEFAULT_MAP: Optional[RegisterMap] = None
+
+
+def default_map() -> RegisterMap:
+    """Mapa embutido (REGISTERS + PROFILES do MDW)."""
+    global _DEFAULT_MAP
+    if _DEFAULT_MAP is None:
+        registers, profiles = validate(REGISTERS, PROFILES)
+        _DEFAULT_MAP = RegisterMap(registers, profiles, name="piovan_mdw")
+    return _DEFAULT_MAP
@@ -0,0 +1,314 @@
+"""
+Cliente Modbus RTU enxuto (somente pyserial).
+
+Mesma interface do ModbusClientRS485 (connect/close/read_holding/
+write_single/write_multiple), sem importar o pymodbus: usado pela CLI,
+onde o tempo de partida até o primeiro byte no fio importa.
+"""
+
+from __future__ import annotations
+
+import logging
+import struct
+import time
+from typing import TYPE_CHECKING, List, Sequence
+
+from modbus.link import (
+    ModbusExceptionResponse,
+    ModbusProtocolError,
+    ModbusTransportError,
+    port_identity,
+    reconnect_port,
+)
+
+if TYPE_CHECKING:
+    from modbus.capture import CaptureWriter  # capture importa os FC_* daqui
+
+
+# =========================
+# CONFIGURAÇÕES PADRÃO
+# =========================
+
+DEFAULT_TIMEOUT = 1.0
+DEFAULT_RETRIES = 3
+
+
+# =========================
+# PROTOCOLO (fonte única para client/capture/writer/cli)
+# =========================
+
+FC_READ_HOLDING = 0x03
+FC_WRITE_SINGLE = 0x06
+FC_WRITE_MULTIPLE = 0x10
+FC_ERROR_FLAG = 0x80
+
+# Limites da especificação Modbus: FC03 e FC16
+MAX_READ_WORDS = 125
+MAX_WRITE_WORDS = 123
+
+
+# =========================
+# CRC16 (Modbus)
+# =========================
+
+def _crc_table() -> List[int]:
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC_TABLE = _crc_table()
+
+
+def crc16(data: bytes) -> int:
+    crc = 0xFFFF
+    for byte in data:
+        crc = (crc >> 8) ^ _CRC_TABLE[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def frame_silence(baudrate: int) -> float:
+    """Silêncio entre frames (3,5 caracteres; fixo em 1,75 ms acima de 19200 bps)."""
+    if baudrate > 19200:
+        return 0.00175
+    return 3.5 * 11 / baudrate
+
+
+# =========================
+# CLIENTE RTU
+# =========================
+
+class RtuClient:
+    """Cliente Modbus RTU direto na serial, sem dependência do pymodbus."""
+
+    def __init__(
+        self,
+        port: str,
+        baudrate: int = 9600,
+        parity: str = "N",
+        stopbits: int = 1,
+        bytesize: int = 8,
+        timeout: float = DEFAULT_TIMEOUT,
+        slave_id: int = 0,
+        retries: int = DEFAULT_RETRIES,
+        logger: logging.Logger | None = None,
+        follow_port: bool = True,
+        capture: CaptureWriter | None = None,
+    ):
+        self.port = port
+        self.baudrate = baudrate
+        self.parity = parity
+        self.stopbits = stopbits
+        self.bytesize = bytesize
+        self.timeout = timeout
+        self.slave_id = slave_id
+        self.retries = retries
+
+        # Se definido, todo request/response é anexado ao log binário
+        self.capture = capture
+
+        self.logger = logger or logging.getLogger("modbus-client")
+
+        self.serial = None
+        self._silence = frame_silence(baudrate)
+        self._last_io = 0.0
+        # follow_port: guarda a identidade do adaptador no connect para
+        # reencontrá-lo após re-enumeração (desligado na CLI: custa partida)
+        self.follow_port = follow_port
+        self._identity = None
+
+    # =========================
+    # CONEXÃO
+    # =========================
+
+    def connect(self) -> None:
+        import serial  # import tardio: só paga o custo quando conecta
+
+        try:
+            self.serial = serial.Serial(
+                port=self.port,
+                baudrate=self.baudrate,
+                parity=self.parity,
+                stopbits=self.stopbits,
+                bytesize=self.bytesize,
+                timeout=self.timeout,
+            )
+        except (serial.SerialException, OSError) as e:
+            raise ModbusTransportError(f"Falha ao conectar na porta {self.port}: {e}") from e
+        if self.follow_port:
+            self._identity = port_identity(self.port) or self._identity
+        self.logger.info("Conectado ao Modbus RTU (%s)", self.port)
+
+    def close(self) -> None:
+        if self.serial is not None:
+            try:
+                self.serial.close()
+            except OSError:
+                pass
+            self.serial = None
+        if self.capture is not None:
+            self.capture.flush()
+        self.logger.info("Conexão Modbus encerrada")
+
+    def _capture(self, function: int, address: int, count: int, payload: Sequence[int]) -> None:
+        if self.capture is not None:
+            self.capture.record(self.slave_id, function, address, count, payload)
+
+    # =========================
+    # RECUPERAÇÃO DO LINK
+    # =========================
+
+    def resync(self) -> None:
+        """Descarta bytes pendentes e espera o silêncio entre frames (porta segue aberta)."""
+        if self.serial is not None:
+            try:
+                self.serial.reset_input_buffer()
+            except OSError as e:
+                raise ModbusTransportError(f"Porta {self.port} perdida: {e}") from e
+        time.sleep(self._silence)
+
+    def reconnect(self, *, attempts: int = 0, base_delay: float = 0.5, max_delay: float = 10.0) -> None:
+        """Reabre a porta após perda real (ver link.reconnect_port)."""
+        reconnect_port(
+            self,
+            self._identity,
+            self._set_port,
+            attempts=attempts,
+            base_delay=base_delay,
+            max_delay=max_delay,
+        )
+
+    def _set_port(self, port: str) -> None:
+        self.port = port
+
+    # =========================
+    # TRANSAÇÃO
+    # =========================
+
+    def _transact(self, pdu: bytes, response_len: int) -> bytes:
+        """
+        Envia ADU (slave + PDU + CRC) e retorna o PDU da resposta.
+        response_len = tamanho esperado da ADU de resposta (com slave e CRC).
+        """
+        if self.serial is None:
+            raise ModbusTransportError(f"Porta {self.port} não conectada")
+
+        adu = bytes([self.slave_id]) + pdu
+        adu += struct.pack("<H", crc16(adu))
+
+        wait = self._last_io + self._silence - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+        self.serial.reset_input_buffer()
+        self.serial.write(adu)
+
+        head = self.serial.read(2)
+        if len(head) < 2:
+            self._last_io = time.monotonic()
+            raise TimeoutError(f"Sem resposta (slave={self.slave_id})")
+
+        # exceção Modbus: slave, fc|0x80, código, CRC
+        remaining = 3 if head[1] & 0x80 else response_len - 2
+        body = self.serial.read(remaining)
+        self._last_io = time.monotonic()
+
+        frame = head + body
+        if len(frame) < 2 + remaining:
+            raise TimeoutError(f"Resposta incompleta (slave={self.slave_id})")
+        if crc16(frame[:-2]) != struct.unpack("<H", frame[-2:])[0]:
+            raise ValueError("CRC inválido na resposta")
+        if frame[0] != self.slave_id:
+            raise ValueError(f"Resposta de slave inesperado: {frame[0]}")
+        if head[1] & 0x80:
+            raise ModbusExceptionResponse(head[1] & 0x7F, frame[2])
+        if head[1] != pdu[0]:
+            raise ValueError(f"Function code inesperado: 0x{head[1]:02X}")
+
+        return frame[1:-2]
+
+    def _with_retries(
+        self,
+        pdu: bytes,
+        response_len: int,
+        what: str,
+        *,
+        address: int,
+        count: int,
+        sent: Sequence[int] = (),
+    ) -> bytes:
+        """
+        Transação com retry + resync. Cada tentativa falha vira um frame
+        fc|FC_ERROR_FLAG na captura (payload = WORDs enviados, vazio na leitura).
+        """
+        function = pdu[0]
+        last_error = None
+
+        for attempt in range(1, self.retries + 1):
+            try:
+                return self._transact(pdu, response_len)
+            except (TimeoutError, ValueError) as e:
+                last_error = e
+            except ModbusExceptionResponse:
+                # exceção Modbus repetiria igual: não adianta tentar de novo
+                self._capture(function | FC_ERROR_FLAG, address, count, sent)
+                raise
+            except ModbusTransportError:
+                raise
+            except OSError as e:
+                # serial.SerialException herda de OSError: porta perdida
+                raise ModbusTransportError(f"Porta {self.port} perdida: {e}") from e
+
+            self._capture(function | FC_ERROR_FLAG, address, count, sent)
+            self.logger.warning("Erro Modbus (tentativa %d/%d) %s", attempt, self.retries, what)
+            self.resync()
+
+        raise ModbusProtocolError(f"Falha {what}: {last_error}")
+
+    # =========================
+    # LEITURA
+    # =========================
+
+    def read_holding(self, address: int, count: int) -> List[int]:
+        """
+        Leitura crua de holding registers.
+        Retorna lista de WORDs (int).
+        """
+        pdu = struct.pack(">BHH", FC_READ_HOLDING, address, count)
+        resp = self._with_retries(
+            pdu,
+            5 + 2 * count,
+            f"lendo holding registers addr={address} count={count}",
+            address=address,
+            count=count,
+        )
+        registers = list(struct.unpack(f">{count}H", resp[2:2 + 2 * count]))
+        self._capture(FC_READ_HOLDING, address, count, registers)
+        return registers
+
+    # =========================
+    # ESCRITA
+    # =========================
+
+    def write_single(self, address: int, value: int) -> None:
+        """
+        Escrita de um único WORD (FC06).
+        """
+        pdu = struct.pack(">BHH", FC_WRITE_SINGLE, address, value)
+        self._with_retries(pdu, 8, f"escrevendo register addr={address}", address=address, count=1, sent=[value])
+        self._capture(FC_WRITE_SINGLE, address, 1, [value])
+        self.logger.debug("Write single addr=%d value=%d", address, value)
+
+    def write_multiple(self, address: int, values: List[int]) -> None:
+        """
+        Escrita de múltiplos WORDs (FC16).
+        """
+        n = len(values)
+        pdu = struct.pack(f">BHHB{n}H", FC_WRITE_MULTIPLE, address, n, 2 * n, *values)
+        self._with_retries(pdu, 8, f"escrevendo registers addr={address}", address=address, count=n, sent=values)
+        self._capture(FC_WRITE_MULTIPLE, address, n, values)
+        self.logger.debug("Write multiple addr=%d count=%d", address, n)
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from modbus import reader
+from modbus.reader import encode_u32, resolve_address
+from modbus.registers import REGISTERS
+from modbus.rtu import MAX_WRITE_WORDS
+
+
+# =========================
+# CONFIG DE ESCRITA
+# =========================
+
+# Validade do WORD em cache para read-modify-write (o CLP/IHM também escreve)
+CACHE_TTL = 5.0
+
+
+# =========================
+# ERROS
+# =========================
+
+class ModbusWriteError(RuntimeError):
+    pass
+
+
+# =========================
+# CODIFICAÇÃO
+# =========================
+
+def encode_value(key: str, value: Any, *, registers: Dict[str, Dict[str, Any]] = REGISTERS) -> List[int]:
+    """
+    Converte valor de engenharia em WORDs conforme o mapa
+    (decimals e DWORD_ORDER). Inverso de read_one.
+    """
+    spec = registers[key]
+    rtype = spec["type"]
+    decimals = int(spec.get("decimals", 0))
+    raw = int(round(float(value) * (10 ** decimals)))
+
+    if rtype == "u16":
+        if not 0 <= raw <= 0xFFFF:
+            raise ValueError(f"Valor fora da faixa u16: {value} (key={key})")
+        return [raw]
+
+    if rtype == "u32":
+        return encode_u32(raw, reader.DWORD_ORDER)
+
+    raise ValueError(f"Tipo não suportado: {rtype!r} (key={key})")
+
+
+def _coalesce(words: Dict[int, int]) -> List[Tuple[int, List[int]]]:
+    """Agrupa endereços contíguos em blocos (address, [words]) de até MAX_WRITE_WORDS."""
+    blocks: List[Tuple[int, List[int]]] = []
+
+    for address in sorted(words):
+        if blocks:
+            start, values = blocks[-1]
+            if start + len(values) == address and len(values) < MAX_WRITE_WORDS:
+                values.append(words[address])
+                continue
+        blocks.append((address, [words[address]]))
+
+    return blocks
+
+
+# =========================
+# ESCRITOR POR KEY
+# =========================
+
+class RegisterWriter:
+    """
+    Escrita por key do REGISTERS, com coalescência em FC16.
+
+    - values: dict key -> valor de engenharia (float/int)
+    - keys com "bits" aceitam WORD inteiro (int) ou dict parcial
+      nome_do_bit -> bool, aplicado via read-modify-write sobre o cache
+      (válido por cache_ttl segundos); registradores só-escrita
+      (ex: mdw_command) partem sempre de 0, sem cache
+    - verify=True relê cada bloco escrito e compara
+    """
+
+    def __init__(
+        self,
+        client,
+        *,
+        base_address: int = 0,
+        slave_id: int = 1,
+        verify: bool = False,
+        cache_ttl: float = CACHE_TTL,
+        registers: Dict[str, Dict[str, Any]] = REGISTERS,
+        logger: logging.Logger | None = None,
+    ):
+        self.client = client
+        self.base_address = base_address
+        self.slave_id = slave_id
+        self.verify = verify
+        self.cache_ttl = cache_ttl
+        self.registers = registers
+        self.logger = logger or logging.getLogger(__name__)
+
+        # address -> (último WORD conhecido (lido ou escrito), time.monotonic())
+        # só registradores legíveis entram aqui
+        self._cache: Dict[int, Tuple[int, float]] = {}
+
+    # =========================
+    # CACHE (READ-MODIFY-WRITE)
+    # =========================
+
+    def _current_word(self, key: str, address: int) -> int:
+        # Registradores só-escrita (ex: mdw_command) partem sempre de 0:
+        # comando é pulso, não acumula bits de escritas anteriores
+        if "R" not in self.registers[key].get("rw", "R"):
+            return 0
+
+        cached = self._cache.get(address)
+        if cached is not None and time.monotonic() - cached[1] < self.cache_ttl:
+            return cached[0]
+
+        word = self.client.read_holding(address=address, count=1)[0]
+        self._cache[address] = (word, time.monotonic())
+        return word
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Descarta o cache (todo ou de uma key) e força nova leitura no próximo RMW."""
+        if key is None:
+            self._cache.clear()
+            return
+        self._cache.pop(resolve_address(self.registers[key]["offset"], self.base_address), None)
+
+    # =========================
+    # PLANO DE ESCRITA
+    # =========================
+
+    def _plan(self, values: Dict[str, Any]) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """Retorna (address -> WORD a escrever, address -> WORD a verificar)."""
+        words: Dict[int, int] = {}
+        checked: Dict[int, int] = {}
+
+        for key, value in values.items():
+            spec = self.registers[key]
+            if "W" not in spec.get("rw", ""):
+                raise ValueError(f"Registrador somente leitura: {key}")
+
+            address = resolve_address(spec["offset"], self.base_address)
+
+            if "bits" in spec and isinstance(value, dict):
+                by_name = {name: bit for bit, name in spec["bits"].items()}
+                word = self._current_word(key, address)
+                for name, state in value.items():
+                    if name not in by_name:
+                        raise ValueError(f"Bit inválido {name!r} (key={key})")
+                    mask = 1 << by_name[name]
+                    word = (word | mask) if state else (word & ~mask)
+                encoded = [word]
+            else:
+                encoded = encode_value(key, value, registers=self.registers)
+
+            for i, w in enumerate(encoded):
+                if address + i in words:
+                    raise ValueError(f"Escrita sobreposta no address {address + i} (key={key})")
+                words[address + i] = w
+                if "R" in spec.get("rw", ""):
+                    checked[address + i] = w
+
+        return words, checked
+
+    # =========================
+    # ESCRITA
+    # =========================
+
+    def write(self, values: Dict[str, Any], *, verify: Optional[bool] = None) -> int:
+        """
+        Escreve várias keys com o mínimo de transações.
+        Retorna o número de transações de escrita executadas.
+        """
+        words, checked = self._plan(values)
+        blocks = _coalesce(words)
+
+        for address, block in blocks:
+            if len(block) == 1:
+                self.client.write_single(address=address, value=block[0])
+            else:
+                self.client.write_multiple(address=address, values=block)
+            now = time.monotonic()
+            for i, w in enumerate(block):
+                if address + i in checked:
+                    self._cache[address + i] = (w, now)
+
+        self.logger.debug("Write %d keys em %d transações", len(values), len(blocks))
+
+        if self.verify if verify is None else verify:
+            self._verify(blocks, checked)
+
+        return len(blocks)
+
+    def set_bits(self, key: str, **bits: bool) -> int:
+        """Atalho para RMW de bits: set_bits("mdw_command", run=True)."""
+        return self.write({key: bits})
+
+    def _verify(self, blocks: List[Tuple[int, List[int]]], expected: Dict[int, int]) -> None:
+        """
+        Relê cada bloco escrito separadamente (só a parte legível dele),
+        sem atravessar buracos do mapa entre blocos.
+        """
+        mismatches: List[str] = []
+
+        for address, block in blocks:
+            addresses = [a for a in range(address, address + len(block)) if a in expected]
+            if not addresses:
+                continue
+            start = addresses[0]
+            count = addresses[-1] - start + 1
+
+            words = self.client.read_holding(address=start, count=count)
+            now = time.monotonic()
+            for a in addresses:
+                got = words[a - start]
+                self._cache[a] = (got, now)
+                if got != expected[a]:
+                    mismatches.append(f"addr={a} esperado={expected[a]} lido={got}")
+
+        if mismatches:
+            raise ModbusWriteError("Verificação de escrita falhou: " + "; ".join(mismatches))
+
+
+def write_many(
+    client,
+    values: Dict[str, Any],
+    *,
+    base_address: int = 0,
+    slave_id: int = 1,
+    verify: bool = False,
+    registers: Dict[str, Dict[str, Any]] = REGISTERS,
+) -> int:
+    """Escrita pontual por key (sem cache persistente entre chamadas)."""
+    writer = RegisterWriter(client, base_address=base_address, slave_id=slave_id, verify=verify, registers=registers)
+    return writer.write(values)
@@ -1,12 +1,26 @@
 import argparse
 import logging
+import os
+import signal
 import time
 
-from modbus.client import ModbusClientRS485
+from modbus.link import ModbusTransportError
 from modbus.reader import read_profile
+from modbus.regmap import default_map, load_register_map
+from modbus.rtu import RtuClient
 from settings import load_settings
 
 
+# =========================
+# SINAIS
+# =========================
+
+def _terminate(signum, frame):
+    # SIGTERM (systemd/docker stop) vira SystemExit para o finally do main
+    # gravar o histórico em aberto e esvaziar a fila MQTT
+    raise SystemExit(0)
+
+
 # =========================
 # MAIN
 # =========================
@@ -17,7 +31,24 @@ def main():
         "--config",
         help="Caminho do arquivo INI (padrão: ./config.ini ou env MODBUS_CONFIG)",
     )
+    parser.add_argument(
+        "--map",
+        default=os.environ.get("MODBUS_MAP"),
+        help="Mapa de registradores externo JSON/YAML/CSV (padrão: mapa embutido ou env MODBUS_MAP)",
+    )
+    parser.add_argument("--mqtt-host", help="Publica os dados lidos neste broker MQTT")
+    parser.add_argument("--mqtt-port", type=int, default=1883)
+    parser.add_argument("--mqtt-topic", default="mdw", help="Tópico base (padrão: mdw)")
+    parser.add_argument("--mqtt-mode", choices=["per_key", "packed"], default="per_key")
+    parser.add_argument("--mqtt-format", choices=["json", "binary"], default="json")
+    parser.add_argument("--mqtt-spool", help="Arquivo de spool para quedas do broker")
+    parser.add_argument("--http-port", type=int, help="Sobe a API HTTP local (snapshot + SSE) nesta porta")
+    parser.add_argument("--http-host", default="127.0.0.1")
+    parser.add_argument("--archive", help="Diretório do arquivo histórico compacto (colunar)")
+    parser.add_argument("--capture", help="Grava todo request/response neste log binário (.mbcap)")
     args = parser.parse_args()
+    if args.mqtt_mode == "per_key" and args.mqtt_format == "binary":
+        parser.error("--mqtt-format binary requer --mqtt-mode packed")
 
     cfg = load_settings(args.config)
 
@@ -28,7 +59,19 @@ def main():
 
     log = logging.getLogger("main")
 
-    client = ModbusClientRS485(
+    regmap = load_register_map(args.map) if args.map else default_map()
+    if cfg.read.profile not in regmap.profiles:
+        parser.error(f"Perfil {cfg.read.profile!r} não existe no mapa {regmap.name!r}: {list(regmap.profiles)}")
+
+    capture = None
+    if args.capture:
+        from modbus.capture import CaptureWriter
+
+        capture = CaptureWriter(args.capture)
+
+    # RtuClient (pyserial direto): erro de protocolo ressincroniza com a porta
+    # aberta; o pymodbus 3.6 fecha e reabre o adaptador a cada CRC/timeout.
+    client = RtuClient(
         port=cfg.modbus.port,
         baudrate=cfg.modbus.baudrate,
         parity=cfg.modbus.parity,
@@ -37,33 +80,86 @@ def main():
         timeout=cfg.modbus.timeout,
         retries=cfg.modbus.retries,
         slave_id=cfg.modbus.slave_id,
+        capture=capture,
     )
 
-    while True:
-        try:
-            log.info("Conectando ao Modbus...")
-            client.connect()
+    sink = None
+    if args.mqtt_host:
+        from modbus.mqtt import MqttSink
+
+        sink = MqttSink(
+            args.mqtt_host,
+            args.mqtt_port,
+            base_topic=args.mqtt_topic,
+            mode=args.mqtt_mode,
+            fmt=args.mqtt_format,
+            spool_path=args.mqtt_spool,
+            registers=regmap.registers,
+            profiles=regmap.profiles,
+        ).start()
+
+    store = server = None
+    if args.http_port:
+        from modbus.http_api import SnapshotServer, SnapshotStore
 
-            while True:
+        store = SnapshotStore()
+        server = SnapshotServer(store, args.http_host, args.http_port).start()
+
+    archive = None
+    if args.archive:
+        from modbus.archive import ArchiveWriter
+
+        archive = ArchiveWriter(args.archive, registers=regmap.registers)
+
+    signal.signal(signal.SIGTERM, _terminate)
+
+    log.info("Conectando ao Modbus...")
+    client.reconnect()
+
+    try:
+        while True:
+            try:
                 data = read_profile(
                     client,
                     profile=cfg.read.profile,
                     base_address=cfg.read.base_address,
                     slave_id=cfg.modbus.slave_id,
+                    regmap=regmap,
                 )
-
                 log.info("Dados lidos: %s", data)
-                time.sleep(cfg.read.interval_seconds)
 
-        except Exception as e:
-            log.error("Erro: %s", e)
-            time.sleep(3)
+                if sink is not None:
+                    sink.publish(cfg.read.profile, data)
+                if store is not None:
+                    store.update(cfg.read.profile, data)
+                if archive is not None:
+                    archive.append(data)
 
-        finally:
-            try:
-                client.close()
-            except Exception:
-                pass
+            except ModbusTransportError as e:
+                # porta perdida de verdade: reabre com backoff (segue re-enumeração)
+                log.error("Porta perdida: %s", e)
+                client.reconnect()
+                continue
+
+            except Exception as e:
+                # erro de protocolo já foi ressincronizado no cliente: só segue
+                log.error("Erro: %s", e)
+
+            time.sleep(cfg.read.interval_seconds)
+
+    finally:
+        if sink is not None:
+            sink.stop()
+        if server is not None:
+            server.stop()
+        if archive is not None:
+            archive.close()
+        try:
+            client.close()
+        except Exception:
+            pass
+        if capture is not None:
+            capture.close()
 
 
 if __name__ == "__main__":